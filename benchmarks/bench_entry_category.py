@@ -0,0 +1,75 @@
+"""
+Benchmark get_entry_category (index) vs scan lama (loop bertingkat).
+
+Jalankan dari root repo:
+    python benchmarks/bench_entry_category.py
+"""
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import pandas as pd
+from utils.entry_map import entry_map
+from utils.mapping_type_unit import get_entry_category, _lookup_entry_category
+from utils.paths import DATA_PATH
+
+
+def get_entry_category_scan(merek, tipe):
+    """Implementasi lama (sebelum index), hanya untuk pembanding"""
+    merek = str(merek).upper()
+    tipe = str(tipe).upper()
+
+    if merek in entry_map:
+        for level, tipe_list in entry_map[merek].items():
+            for t in tipe_list:
+                if t in tipe:
+                    return level
+    return "Unknown"
+
+
+def load_pairs():
+    df = pd.read_excel(DATA_PATH, usecols=["MEREK", "TIPE UNIT"]).dropna()
+    merek = df["MEREK"].astype(str).str.strip().str.lower()
+    tipe = df["TIPE UNIT"].astype(str).str.strip().str.lower()
+    return list(zip(merek, tipe))
+
+
+def main(repeat=5):
+    pairs = load_pairs()
+    unique_pairs = sorted(set(pairs))
+
+    def run_scan():
+        for m, t in pairs:
+            get_entry_category_scan(m, t)
+
+    def run_index_cold():
+        _lookup_entry_category.cache_clear()
+        for m, t in pairs:
+            get_entry_category(m, t)
+
+    def run_index_warm():
+        for m, t in pairs:
+            get_entry_category(m, t)
+
+    results = {
+        "scan": min(timeit.repeat(run_scan, number=1, repeat=repeat)),
+        "index (cache dingin)": min(timeit.repeat(run_index_cold, number=1, repeat=repeat)),
+        "index (cache hangat)": min(timeit.repeat(run_index_warm, number=1, repeat=repeat)),
+    }
+
+    print(f"{len(pairs)} baris, {len(unique_pairs)} pasangan unik")
+    for name, sec in results.items():
+        print(f"{name:<22} {sec * 1000:8.2f} ms  ({sec / len(pairs) * 1e6:6.2f} us/baris)")
+
+    changed = [
+        (m, t, get_entry_category_scan(m, t), get_entry_category(m, t))
+        for m, t in unique_pairs
+        if get_entry_category_scan(m, t) != get_entry_category(m, t)
+    ]
+    print(f"{len(changed)} pasangan berubah kategori (aturan longest-match)")
+
+
+if __name__ == "__main__":
+    main()
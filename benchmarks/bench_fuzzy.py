@@ -0,0 +1,53 @@
+"""
+Benchmark index fuzzy (salah ketik) untuk kerusakan dan tipe unit.
+
+Jalankan dari root repo:
+    python benchmarks/bench_fuzzy.py
+"""
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from utils.normalize import _DAMAGE_FUZZY, _DAMAGE_TARGETS, normalize_damage, _match_damage
+from utils.mapping_type_unit import _ENTRY_INDEX
+
+
+def typo(text, rng):
+    """Satu salah ketik acak: hapus, ganti, atau dobel satu huruf"""
+    i = rng.randrange(len(text))
+    kind = rng.choice("hgd")
+    if kind == "h":
+        return text[:i] + text[i + 1:]
+    if kind == "g":
+        return text[:i] + rng.choice("abcdefghijklmnopqrstuvwxyz") + text[i + 1:]
+    return text[:i] + text[i] + text[i:]
+
+
+def per_call_us(fn, items, repeat=5):
+    def run():
+        for x in items:
+            fn(x)
+    return min(timeit.repeat(run, number=1, repeat=repeat)) / len(items) * 1e6
+
+
+def main(n=2000, seed=0):
+    rng = random.Random(seed)
+    damages = [typo(k, rng) for k in rng.choices(list(_DAMAGE_TARGETS), k=n)]
+    samsung = _ENTRY_INDEX["SAMSUNG"][2]
+    tipes = [typo(k, rng) for k in rng.choices(samsung.keys, k=n)]
+
+    found = sum(_DAMAGE_FUZZY.best(t) is not None for t in damages)
+    print(f"kerusakan salah ketik: {found}/{n} dikenali")
+    print(f"FuzzyIndex kerusakan      {per_call_us(_DAMAGE_FUZZY.best, damages):8.2f} us/panggil")
+    print(f"FuzzyIndex tipe SAMSUNG   {per_call_us(samsung.best, tipes):8.2f} us/panggil")
+
+    _match_damage.cache_clear()
+    normalize_damage(damages[0])
+    print(f"normalize_damage (cache)  {per_call_us(normalize_damage, damages[:1] * n):8.2f} us/panggil")
+
+
+if __name__ == "__main__":
+    main()
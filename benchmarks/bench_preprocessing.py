@@ -0,0 +1,59 @@
+"""
+Benchmark + cek paritas preprocess_training (kolumnar) vs versi lama (apply per baris).
+
+Jalankan dari root repo:
+    python benchmarks/bench_preprocessing.py [skala]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import pandas as pd
+from utils.normalize import normalize_damage
+from utils.mapping_type_unit import get_entry_category
+from utils.preprocessing import preprocess_training, ESCAPED_INVALID, filter_kerusakan_minimum
+from utils.paths import DATA_PATH
+
+
+def preprocess_training_rowwise(df):
+    """Implementasi lama (sebelum versi kolumnar), hanya untuk pembanding"""
+    for col in ['MEREK', 'TIPE UNIT', 'KERUSAKAN']:
+        df[col] = df[col].astype(str).str.strip().str.lower()
+        df = df[~df[col].str.contains('|'.join(ESCAPED_INVALID), na=False)]
+
+    df["KERUSAKAN"] = df["KERUSAKAN"].apply(normalize_damage)
+    df["TIPE UNIT"] = df.apply(lambda x: get_entry_category(x["MEREK"], x["TIPE UNIT"]), axis=1)
+
+    return filter_kerusakan_minimum(df)
+
+
+def load_dataset(scale=1):
+    df = pd.read_excel(DATA_PATH).dropna()
+    if scale > 1:
+        df = pd.concat([df] * scale, ignore_index=True)
+    return df
+
+
+def timed(func, df):
+    start = time.perf_counter()
+    out = func(df.copy())
+    return out, time.perf_counter() - start
+
+
+def main(scale=1):
+    df = load_dataset(scale)
+
+    expected, t_old = timed(preprocess_training_rowwise, df)
+    actual, t_new = timed(preprocess_training, df)
+
+    pd.testing.assert_frame_equal(actual, expected)
+
+    print(f"{len(df)} baris -> {len(actual)} baris (output identik)")
+    print(f"apply per baris  {t_old * 1000:9.1f} ms")
+    print(f"kolumnar         {t_new * 1000:9.1f} ms")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1)
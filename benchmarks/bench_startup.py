@@ -0,0 +1,68 @@
+"""
+Waktu import aplikasi serving (`import app`) memakai `python -X importtime`.
+
+Jalankan dari root repo:
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --budget-ms 1000   # untuk CI
+
+Dengan --budget-ms, keluar dengan kode 1 kalau waktu import melebihi budget
+atau kalau dependensi training (pandas, sklearn, ...) ikut ter-import.
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+# Hanya boleh dimuat saat /train, /records, atau gambar tree pertama kali dipakai
+TRAINING_ONLY = ("pandas", "sklearn", "scipy", "matplotlib", "joblib", "openpyxl")
+
+
+def import_times(module="app"):
+    """(total detik, {nama modul: kumulatif detik}) dari satu proses baru"""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=os.path.join(ROOT, "src"), capture_output=True, text=True, check=True,
+    )
+    cumulative = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cum, name = line[len("import time:"):].split("|")
+        cumulative[name.strip()] = int(cum) / 1e6
+    return cumulative[module], cumulative
+
+
+def measure_startup(repeat=5, module="app"):
+    runs = [import_times(module) for _ in range(repeat)]
+    seconds, cumulative = min(runs, key=lambda r: r[0])
+    heavy = sorted({name.split(".")[0] for name in cumulative} & set(TRAINING_ONLY))
+    return {"seconds": seconds, "modules": len(cumulative), "training_imports": heavy}, cumulative
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark waktu import app")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, help="gagal kalau import app lebih lambat dari ini")
+    parser.add_argument("--top", type=int, default=10, help="tampilkan N modul terlama")
+    args = parser.parse_args()
+
+    result, cumulative = measure_startup(args.repeat)
+    print(f"import app: {result['seconds'] * 1000:.1f} ms ({result['modules']} modul, terbaik dari {args.repeat})")
+    top = sorted(((sec, name) for name, sec in cumulative.items() if name != "app"), reverse=True)
+    for sec, name in top[:args.top]:
+        print(f"  {sec * 1000:8.1f} ms  {name}")
+
+    failed = False
+    if result["training_imports"]:
+        print(f"GAGAL: dependensi training ikut ter-import: {', '.join(result['training_imports'])}")
+        failed = True
+    if args.budget_ms is not None and result["seconds"] * 1000 > args.budget_ms:
+        print(f"GAGAL: melebihi budget {args.budget_ms:.0f} ms")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
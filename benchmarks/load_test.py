@@ -0,0 +1,128 @@
+"""
+Load generator HTTP untuk /estimate.
+
+Mengirim ulang payload dari file JSONL (satu {"brand", "type", "damage"} per
+baris) ke server yang sedang berjalan, dengan N koneksi paralel.
+Tanpa --requests, payload diambil dari data/dataset.xlsx.
+
+    python benchmarks/load_test.py --url http://127.0.0.1:8080 \\
+        --requests payloads.jsonl --concurrency 64 --total 20000
+"""
+import argparse
+import http.client
+import itertools
+import json
+import os
+import sys
+import threading
+import time
+from urllib.parse import urlparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+
+def load_dataset(path=None):
+    """Dataset training mentah sebagai satu DataFrame (dibaca per chunk lewat ingest)"""
+    import pandas as pd
+    from utils.ingest import iter_chunks
+    from utils.paths import DATA_PATH
+
+    return pd.concat(iter_chunks(path or DATA_PATH), ignore_index=True)
+
+
+def load_payloads(path=None, limit=None):
+    if path:
+        with open(path) as f:
+            payloads = [json.loads(line) for line in f if line.strip()]
+    else:
+        df = load_dataset()
+        payloads = [
+            {"brand": m, "type": t, "damage": d}
+            for m, t, d in zip(df["MEREK"], df["TIPE UNIT"], df["KERUSAKAN"])
+        ]
+    return payloads[:limit] if limit else payloads
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return 0.0
+    k = min(len(sorted_values) - 1, int(round(p / 100 * (len(sorted_values) - 1))))
+    return sorted_values[k]
+
+
+def summarize(latencies, errors, elapsed):
+    latencies = sorted(latencies)
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "seconds": elapsed,
+        "throughput_rps": len(latencies) / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+    }
+
+
+def run_http(url, payloads, total, concurrency, path="/estimate"):
+    """Setiap thread memakai 1 koneksi keep-alive dan mengambil payload bergiliran"""
+    target = urlparse(url)
+    bodies = itertools.cycle([json.dumps(p).encode() for p in payloads])
+    counter = itertools.count()
+    lock = threading.Lock()
+    latencies = []
+    errors = [0]
+
+    def worker():
+        conn = http.client.HTTPConnection(target.hostname, target.port or 80, timeout=30)
+        local = []
+        local_errors = 0
+        while next(counter) < total:
+            with lock:
+                body = next(bodies)
+            start = time.perf_counter()
+            try:
+                conn.request("POST", path, body=body, headers={"Content-Type": "application/json"})
+                resp = conn.getresponse()
+                resp.read()
+                if resp.status >= 500:
+                    local_errors += 1
+            except (OSError, http.client.HTTPException):
+                local_errors += 1
+                conn.close()
+                conn = http.client.HTTPConnection(target.hostname, target.port or 80, timeout=30)
+                continue
+            local.append(time.perf_counter() - start)
+        conn.close()
+        with lock:
+            latencies.extend(local)
+            errors[0] += local_errors
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return summarize(latencies, errors[0], time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--url", default="http://127.0.0.1:8080")
+    parser.add_argument("--requests", help="file JSONL berisi payload /estimate")
+    parser.add_argument("--total", type=int, default=10000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--output", help="simpan hasil sebagai JSON")
+    args = parser.parse_args()
+
+    result = run_http(args.url, load_payloads(args.requests), args.total, args.concurrency)
+    result.update(url=args.url, concurrency=args.concurrency)
+    print(json.dumps(result, indent=2))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
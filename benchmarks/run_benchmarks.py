@@ -0,0 +1,226 @@
+"""
+Suite benchmark untuk jalur estimate dan train. Hasil ditulis sebagai JSON
+supaya bisa dibandingkan antar commit.
+
+    python benchmarks/run_benchmarks.py --output bench.json
+    python benchmarks/run_benchmarks.py --scales 1,10 --compare bench.json
+
+Isi:
+- replay payload /estimate lewat Flask test client (dan HTTP kalau --url diisi)
+- waktu `import app` (python -X importtime, proses baru)
+- micro-benchmark normalize_damage, get_entry_category, preprocess_input
+- preprocess_training dan train_model_service pada dataset sintetis
+  (dataset.xlsx diulang 1x, 10x, 100x)
+
+Dengan --compare, proses keluar dengan kode 1 kalau ada metrik yang lebih
+lambat dari baseline melebihi --tolerance.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import timeit
+import warnings
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import pandas as pd
+from load_test import load_dataset, load_payloads, run_http, summarize
+from bench_startup import measure_startup
+from utils.normalize import normalize_damage, _match_damage
+from utils.mapping_type_unit import get_entry_category, _lookup_entry_category
+from utils.preprocessing import preprocess_input, preprocess_training
+
+# Metrik yang dipakai untuk deteksi regresi (semakin kecil semakin baik)
+LOWER_IS_BETTER = ("seconds", "us_per_call", "p50_ms", "p95_ms", "p99_ms")
+
+
+def best_of(func, repeat=5):
+    return min(timeit.repeat(func, number=1, repeat=repeat))
+
+
+def bench_client(payloads, total):
+    """Replay payload lewat Flask test client (tanpa jaringan)"""
+    from app import app
+
+    client = app.test_client()
+    latencies = []
+    errors = 0
+    start = time.perf_counter()
+    for i in range(total):
+        t = time.perf_counter()
+        resp = client.post("/estimate", json=payloads[i % len(payloads)])
+        latencies.append(time.perf_counter() - t)
+        if resp.status_code >= 500:
+            errors += 1
+    return summarize(latencies, errors, time.perf_counter() - start)
+
+
+def bench_micro(df):
+    damages = list(df["KERUSAKAN"].astype(str))
+    pairs = list(zip(df["MEREK"].astype(str), df["TIPE UNIT"].astype(str)))
+    rows = list(zip(df["MEREK"].astype(str), df["TIPE UNIT"].astype(str), damages))
+
+    def normalize_cold():
+        _match_damage.cache_clear()
+        for d in damages:
+            normalize_damage(d)
+
+    def entry_cold():
+        _lookup_entry_category.cache_clear()
+        for m, t in pairs:
+            get_entry_category(m, t)
+
+    def preprocess_input_cold():
+        _match_damage.cache_clear()
+        _lookup_entry_category.cache_clear()
+        for m, t, d in rows:
+            preprocess_input(m, t, d)
+
+    results = {}
+    for name, func in [
+        ("normalize_damage", normalize_cold),
+        ("get_entry_category", entry_cold),
+        ("preprocess_input", preprocess_input_cold),
+    ]:
+        sec = best_of(func)
+        results[name] = {"calls": len(rows), "seconds": sec, "us_per_call": sec / len(rows) * 1e6}
+    return results
+
+
+def synthetic_dataset(df, scale):
+    return pd.concat([df] * scale, ignore_index=True) if scale > 1 else df.copy()
+
+
+def bench_preprocess_training(df, scale):
+    data = synthetic_dataset(df, scale)
+    sec = best_of(lambda: preprocess_training(data.copy()), repeat=3 if scale < 100 else 1)
+    return {"rows": len(data), "seconds": sec}
+
+
+def bench_train(df, scale):
+    """
+    train_model_service di direktori sementara (model asli tidak tersentuh).
+    cold: termasuk parsing + preprocessing pertama; warm: data ter-encode dari
+    cache, langsung fit (force=True); unchanged: data sama, training dilewati.
+    """
+    from services.train_service import train_model_service
+
+    data = synthetic_dataset(df, scale)
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            os.makedirs("data")
+            data_path = os.path.join(tmp, "data", "dataset.csv")
+            data.to_csv(data_path, index=False)
+
+            start = time.perf_counter()
+            train_model_service(data_path=data_path)
+            cold = time.perf_counter() - start
+
+            start = time.perf_counter()
+            result = train_model_service(data_path=data_path, force=True)
+            warm = time.perf_counter() - start
+
+            start = time.perf_counter()
+            train_model_service(data_path=data_path)
+            unchanged = time.perf_counter() - start
+        finally:
+            os.chdir(cwd)
+    return {
+        "rows": len(data), "seconds": warm, "cold_seconds": cold,
+        "unchanged_seconds": unchanged, "accuracy": result["accuracy"],
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, text=True, stderr=subprocess.DEVNULL
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline, tolerance):
+    """List regresi: (nama, metrik, baseline, sekarang)"""
+    regressions = []
+    for name, metrics in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        # Ukuran beban berbeda (mis. --total lain) → tidak bisa dibandingkan
+        if any(metrics.get(k) != base.get(k) for k in ("rows", "requests", "calls")):
+            continue
+        for key in LOWER_IS_BETTER:
+            if key in metrics and key in base and base[key] > 0:
+                if metrics[key] > base[key] * (1 + tolerance):
+                    regressions.append((name, key, base[key], metrics[key]))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark estimate & train")
+    parser.add_argument("--scales", default="1,10,100", help="skala dataset sintetis, pisahkan dengan koma")
+    parser.add_argument("--requests", help="file JSONL payload /estimate (default: dari dataset)")
+    parser.add_argument("--total", type=int, default=5000, help="jumlah request untuk replay")
+    parser.add_argument("--url", help="jalankan juga replay HTTP ke server ini")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--skip-train", action="store_true")
+    parser.add_argument("--output", help="tulis hasil ke file JSON")
+    parser.add_argument("--compare", help="file JSON hasil sebelumnya sebagai baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+
+    warnings.filterwarnings("ignore")
+    os.chdir(ROOT)
+
+    df = load_dataset().dropna()
+    payloads = load_payloads(args.requests)
+    scales = [int(s) for s in args.scales.split(",") if s]
+
+    results = {"startup_import_app": measure_startup()[0]}
+    results["estimate_client"] = bench_client(payloads, args.total)
+    if args.url:
+        results["estimate_http"] = run_http(args.url, payloads, args.total, args.concurrency)
+    results.update(bench_micro(df))
+    for scale in scales:
+        results[f"preprocess_training_{scale}x"] = bench_preprocess_training(df, scale)
+        if not args.skip_train:
+            results[f"train_model_service_{scale}x"] = bench_train(df, scale)
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "cpus": os.cpu_count(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+    print(json.dumps(report, indent=2))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.tolerance)
+        for name, key, old, new in regressions:
+            print(f"REGRESI {name}.{key}: {old:.4f} -> {new:.4f}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""
+Mode serving konkurensi tinggi untuk /estimate:
+
+    gunicorn -c gunicorn.conf.py
+
+- worker gthread: koneksi keep-alive ditampung poller worker, request
+  dikerjakan beberapa thread; model cukup satu salinan per worker.
+  Thread sedikit (default 4): /estimate hampir seluruhnya CPU + GIL, thread
+  lebih banyak hanya menambah antrean GIL dan memperburuk p99
+  (lihat benchmarks/README.md)
+- preload_app: app + model + tabel response dimuat sekali di master
+  sebelum fork, lalu dibagi ke semua worker secara copy-on-write
+  (gc.freeze supaya GC tidak menyentuh halaman memori yang dibagi)
+
+Jumlah worker/thread bisa diatur lewat WEB_CONCURRENCY dan GUNICORN_THREADS.
+"""
+import gc
+import os
+
+pythonpath = "src"
+wsgi_app = "app:app"
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:8080")
+
+worker_class = "gthread"
+workers = int(os.environ.get("WEB_CONCURRENCY", 2))
+threads = int(os.environ.get("GUNICORN_THREADS", 4))
+preload_app = True
+keepalive = 5
+
+
+def when_ready(server):
+    # Dijalankan di master setelah app dimuat, sebelum worker di-fork
+    from services.estimate_service import warm_up
+
+    warm_up()
+    gc.freeze()
+
+
+def worker_exit(server, worker):
+    # Counter terakhir worker ditulis sebelum keluar; /stats memindahkannya ke retired.json
+    from services.stats_service import flush_stats
+
+    flush_stats()
@@ -1,32 +1,230 @@
-from flask import Flask, request, jsonify
+import json
+import logging
+import os
+from flask import Flask, Response, request, jsonify
 from flask_cors import CORS
-from services.train_service import train_model_service
-from services.estimate_service import estimate_service
+from services.train_jobs import submit_train_job, get_job
+from services.estimate_service import estimate_service, estimate_batch_service
+from services.record_service import append_records_service
+from services.model_registry import get_snapshot, registry_pool_stats, StaleModelError
+from services.tree_service import has_tree, tree_png, tree_text, tree_json
+from services.response_cache import response_cache_stats
+from services.stats_service import stats_report
+from utils.metrics import ESTIMATE_STAGE_SECONDS, ESTIMATE_REQUEST_SECONDS, render_metrics, render_gauges
+
+logging.basicConfig(level=os.environ.get("LOG_LEVEL", "WARNING").upper())
 
 app = Flask(__name__)
 CORS(app)
 
+
+def _request_branch(body=None):
+    """Cabang dari header X-Branch, ?branch=, atau field "branch" body (None = model default)"""
+    branch = request.headers.get("X-Branch") or request.args.get("branch")
+    if not branch and isinstance(body, dict):
+        branch = body.get("branch")
+    return branch or None
+
+
 @app.route("/estimate", methods=["POST"])
 def estimate():
+    with ESTIMATE_REQUEST_SECONDS.time("/estimate"):
+        try:
+            with ESTIMATE_STAGE_SECONDS.time("parse"):
+                data = request.json
+            result = estimate_service(data, branch=_request_branch())
+            with ESTIMATE_STAGE_SECONDS.time("response"):
+                return jsonify(result)
+        except Exception as e:
+            return jsonify({"success": False, "message": str(e)}), 500
+
+
+def _read_ndjson(stream):
+    """Baca body NDJSON baris per baris; baris yang rusak dikembalikan sebagai exception"""
+    rows = []
+    for line in stream:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            rows.append(json.loads(line))
+        except ValueError as e:
+            rows.append(e)
+    return rows
+
+
+@app.route("/estimate/batch", methods=["POST"])
+def estimate_batch():
+    with ESTIMATE_REQUEST_SECONDS.time("/estimate/batch"):
+        try:
+            if request.mimetype in ("application/x-ndjson", "application/jsonl"):
+                rows = _read_ndjson(request.stream)
+            else:
+                # silent=True: body JSON rusak -> None -> 400 (bukan BadRequest -> 500)
+                rows = request.get_json(silent=True)
+                if not isinstance(rows, list):
+                    return jsonify({"success": False, "message": "Body harus berupa array JSON"}), 400
+
+            result = estimate_batch_service(rows, branch=_request_branch())
+            return jsonify(result)
+        except Exception as e:
+            return jsonify({"success": False, "message": str(e)}), 500
+
+
+@app.route("/estimate/cache", methods=["GET"])
+def estimate_cache_stats():
     try:
-        data = request.json
-        result = estimate_service(data)
+        snapshot = get_snapshot(_request_branch())
+    except ValueError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+    stats = response_cache_stats(snapshot)
+    if stats is None:
+        return jsonify({"success": False, "message": "Cache belum dibuat"}), 404
+    return jsonify({"success": True, **stats})
+
+
+@app.route("/records", methods=["POST"])
+def add_records():
+    try:
+        rows = request.get_json(silent=True)
+        if isinstance(rows, dict):
+            rows = [rows]
+        if not isinstance(rows, list):
+            return jsonify({"success": False, "message": "Body harus berupa object atau array JSON"}), 400
+
+        # X-Branch / ?branch=, atau field "branch" di data (harus sama semua)
+        result = append_records_service(rows, branch=_request_branch())
         return jsonify(result)
+    except ValueError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
     except Exception as e:
         return jsonify({"success": False, "message": str(e)}), 500
 
 
+def _train_flag(body, name):
+    return request.args.get(name, "").lower() in ("1", "true") or (
+        isinstance(body, dict) and body.get(name) is True
+    )
+
+
 @app.route("/train", methods=["POST"])
 def train_model():
     try:
-        result = train_model_service()
+        # ?search=1 atau {"search": true}: pilih model lewat cross-validation
+        # ?regression=1 atau {"regression": true}: tambah estimasi biaya numerik
+        body = request.get_json(silent=True)
+        # ?candidate=1 atau {"candidate": true}: simpan sebagai model kandidat (shadow), model aktif tetap
+        job, created = submit_train_job(
+            search=_train_flag(body, "search"),
+            regression=_train_flag(body, "regression"),
+            candidate=_train_flag(body, "candidate"),
+            # ?force=1 atau {"force": true}: latih ulang walau data & mapping tidak berubah
+            force=_train_flag(body, "force"),
+            # X-Branch / ?branch= / {"branch": "..."}: latih model cabang dari data cabang
+            branch=_request_branch(body),
+        )
         return jsonify({
             "success": True,
-            "message": "Model trained successfully",
-            **result
-        })
+            "message": "Training dimulai" if created else "Training sedang berjalan",
+            "job_id": job["id"],
+            "status": job["status"],
+        }), 202
+    except ValueError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
     except Exception as e:
         return jsonify({"success": False, "message": str(e)}), 500
 
+
+@app.route("/train/<job_id>", methods=["GET"])
+def train_status(job_id):
+    job = get_job(job_id)
+    if job is None:
+        return jsonify({"success": False, "message": "Job tidak ditemukan"}), 404
+
+    response = {"success": True, "job_id": job["id"], "status": job["status"]}
+    if job["status"] == "done":
+        response.update(message="Model trained successfully", **job["result"])
+    elif job["status"] == "failed":
+        response.update(success=False, message=job["error"])
+    return jsonify(response)
+
+@app.route("/model", methods=["GET"])
+def model_info():
+    """Manifest model aktif (versi, metrik, hash dataset); ?branch= untuk model cabang"""
+    try:
+        snapshot = get_snapshot(_request_branch())
+    except ValueError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+    if snapshot is None:
+        return jsonify({"success": False, "message": "Model belum dilatih"}), 404
+    manifest = {k: v for k, v in snapshot.manifest.items() if k not in ("arrays", "classes")}
+    return jsonify({"success": True, "source": snapshot.version[0], **manifest})
+
+
+def _tree_snapshot_or_404():
+    try:
+        snapshot = get_snapshot(_request_branch())
+    except ValueError as e:
+        return None, (jsonify({"success": False, "message": str(e)}), 400)
+    if snapshot is None:
+        return None, (jsonify({"success": False, "message": "Model belum dilatih"}), 404)
+    if not has_tree(snapshot):
+        return None, (jsonify({"success": False, "message": "Model aktif bukan decision tree tunggal"}), 404)
+    return snapshot, None
+
+
+@app.route("/model/tree.png", methods=["GET"])
+def model_tree_png():
+    snapshot, error = _tree_snapshot_or_404()
+    if error:
+        return error
+    try:
+        return Response(tree_png(snapshot), mimetype="image/png")
+    except StaleModelError as e:
+        return jsonify({"success": False, "message": str(e)}), 409
+
+
+@app.route("/model/tree.txt", methods=["GET"])
+def model_tree_text():
+    snapshot, error = _tree_snapshot_or_404()
+    if error:
+        return error
+    try:
+        return Response(tree_text(snapshot), mimetype="text/plain")
+    except StaleModelError as e:
+        return jsonify({"success": False, "message": str(e)}), 409
+
+
+@app.route("/model/tree.json", methods=["GET"])
+def model_tree_json():
+    snapshot, error = _tree_snapshot_or_404()
+    if error:
+        return error
+    return jsonify(tree_json(snapshot))
+
+
+@app.route("/stats", methods=["GET"])
+def stats():
+    """Statistik trafik /estimate semua worker vs sebaran data training"""
+    try:
+        return jsonify({"success": True, **stats_report(get_snapshot())})
+    except Exception as e:
+        return jsonify({"success": False, "message": str(e)}), 500
+
+
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    """Metrik format Prometheus untuk worker yang melayani request ini"""
+    body = render_metrics()
+    stats = response_cache_stats(get_snapshot())
+    if stats is not None:
+        body += render_gauges("estimate_cache", stats, "Statistik cache response /estimate") + "\n"
+    pool = registry_pool_stats()
+    pool_gauges = {"branches": len(pool["branches"]), "bytes": pool["bytes"],
+                   "max_bytes": pool["max_bytes"], "evictions": pool["evictions"]}
+    body += render_gauges("model_pool", pool_gauges, "Model cabang yang dimuat di worker ini") + "\n"
+    return Response(body, mimetype="text/plain; version=0.0.4")
+
+
 if __name__ == "__main__":
     app.run(debug=True)
@@ -0,0 +1,37 @@
+"""
+Skor file CSV/JSONL/Excel secara offline (tanpa HTTP), dengan model hasil training.
+
+Jalankan dari root repo:
+    python src/score.py data/dataset.xlsx -o hasil.jsonl
+    python src/score.py quotes.csv -o hasil.csv --workers 4
+
+Input berisi kolom brand/type/damage (payload /estimate) atau
+MEREK/TIPE UNIT/KERUSAKAN (bentuk dataset.xlsx).
+"""
+import argparse
+import json
+import sys
+from services.score_service import score_file, SCORE_CHUNK_ROWS
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Estimasi biaya untuk semua baris file")
+    parser.add_argument("input", help="file .csv, .jsonl, atau .xlsx")
+    parser.add_argument("-o", "--output", required=True, help="file hasil (.jsonl atau .csv)")
+    parser.add_argument("--workers", type=int, default=None, help="jumlah proses (default: jumlah CPU)")
+    parser.add_argument("--chunksize", type=int, default=SCORE_CHUNK_ROWS, help="baris per batch")
+    args = parser.parse_args(argv)
+
+    try:
+        summary = score_file(args.input, args.output, workers=args.workers, chunksize=args.chunksize)
+    except Exception as e:
+        print(f"Gagal: {e}", file=sys.stderr)
+        return 1
+
+    # Ringkasan throughput ke stderr supaya stdout tetap bersih
+    print(json.dumps(summary, indent=2), file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
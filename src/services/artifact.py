@@ -0,0 +1,79 @@
+"""
+Format bundle model (satu file):
+
+    MAGIC (8 byte) | panjang manifest (8 byte, little endian) | manifest JSON
+    | padding | array 1 | padding | array 2 | ...
+
+Manifest berisi versi model, metrik training, hash dataset, daftar kelas tiap
+kolom, dan posisi (offset/dtype/shape) setiap array. Array disimpan mentah
+dengan alignment 64 byte supaya bisa langsung di-mmap read-only: semua worker
+gunicorn membaca halaman memori yang sama dari page cache.
+"""
+import json
+import mmap
+import os
+import struct
+import numpy as np
+
+MAGIC = b"ESTBNDL1"
+ALIGN = 64
+FORMAT_VERSION = 1
+
+
+def _align(n):
+    return (n + ALIGN - 1) // ALIGN * ALIGN
+
+
+def write_bundle(path, manifest, arrays):
+    """Tulis bundle ke file sementara lalu rename (atomic)"""
+    arrays = {name: np.ascontiguousarray(a) for name, a in arrays.items()}
+
+    # Offset dihitung relatif terhadap awal area data
+    layout = {}
+    offset = 0
+    for name, a in arrays.items():
+        offset = _align(offset)
+        layout[name] = {"offset": offset, "dtype": a.dtype.str, "shape": list(a.shape)}
+        offset += a.nbytes
+
+    manifest = dict(manifest, format=FORMAT_VERSION, arrays=layout)
+    header = json.dumps(manifest, ensure_ascii=False).encode()
+    data_start = _align(len(MAGIC) + 8 + len(header))
+
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<Q", len(header)))
+        f.write(header)
+        for name, a in arrays.items():
+            f.seek(data_start + layout[name]["offset"])
+            f.write(a.tobytes())
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    return manifest
+
+
+def read_bundle(path):
+    """
+    Return (manifest, arrays). Array berupa view read-only atas mmap file,
+    jadi tidak ada salinan per proses.
+    """
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} bukan bundle model")
+        (header_len,) = struct.unpack("<Q", f.read(8))
+        manifest = json.loads(f.read(header_len))
+        if manifest.get("format") != FORMAT_VERSION:
+            raise ValueError(f"Format bundle tidak didukung: {manifest.get('format')}")
+        data_start = _align(len(MAGIC) + 8 + header_len)
+        buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    arrays = {}
+    for name, spec in manifest["arrays"].items():
+        dtype = np.dtype(spec["dtype"])
+        count = int(np.prod(spec["shape"])) if spec["shape"] else 1
+        arrays[name] = np.frombuffer(
+            buf, dtype=dtype, count=count, offset=data_start + spec["offset"]
+        ).reshape(spec["shape"])
+    return manifest, arrays
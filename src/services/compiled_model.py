@@ -0,0 +1,104 @@
+import numpy as np
+
+FEATURE_COLUMNS = ["MEREK", "TIPE UNIT", "KERUSAKAN"]
+
+
+def _feature_grid(shape):
+    """Semua kombinasi kode (merek, tipe, kerusakan), urutan C sesuai np.ndindex"""
+    return np.indices(shape).reshape(len(shape), -1).T
+
+
+def _traverse(tree, X):
+    """Jalankan tree untuk banyak baris sekaligus, hanya pakai array node (tanpa sklearn)"""
+    X = X.astype(np.float32)
+    node = np.zeros(len(X), dtype=np.intp)
+    rows = np.arange(len(X))
+    is_leaf = tree.children_left == tree.children_right
+
+    active = ~is_leaf[node]
+    while active.any():
+        idx = rows[active]
+        n = node[idx]
+        go_left = X[idx, tree.feature[n]] <= tree.threshold[n]
+        node[idx] = np.where(go_left, tree.children_left[n], tree.children_right[n])
+        active = ~is_leaf[node]
+    return node
+
+
+def compile_lookup_table(model, encoders):
+    """
+    Compile model jadi tabel dense [merek, tipe, kerusakan] -> kode kelas.
+    Dengan fitur kategorikal berkardinalitas kecil, prediksi cukup satu indexing array.
+    Decision tree tunggal di-compile dari array node-nya; model lain (mis. hasil
+    pemilihan model berupa random forest) lewat satu kali predict atas semua kombinasi.
+    """
+    shape = tuple(len(encoders[col].classes_) for col in FEATURE_COLUMNS)
+    X = _feature_grid(shape)
+    if not hasattr(model, "tree_"):
+        return np.asarray(model.predict(X)).astype(np.intp).reshape(shape)
+
+    tree = model.tree_
+    leaves = _traverse(tree, X)
+    leaf_class = np.asarray(model.classes_)[tree.value[:, 0, :].argmax(axis=1)]
+    return leaf_class[leaves].astype(np.intp).reshape(shape)
+
+
+def verify_lookup_table(table, model):
+    """Pastikan tabel sama persis dengan model.predict di semua kombinasi"""
+    X = _feature_grid(table.shape)
+    expected = model.predict(X)
+    mismatch = int((table.reshape(-1) != expected).sum())
+    if mismatch:
+        raise ValueError(f"Tabel prediksi berbeda dengan model pada {mismatch} kombinasi")
+    return table.size
+
+
+def _majority(table, axes, n_classes):
+    """Kelas terbanyak di sepanjang axes (seri → kode kelas terkecil)"""
+    counts = (table[..., None] == np.arange(n_classes)).sum(axis=axes)
+    return counts.argmax(axis=-1)
+
+
+def compile_fallback_tables(table, n_classes):
+    """
+    Tabel prediksi untuk input yang merek dan/atau tipenya tidak dikenal:
+    hasil voting tabel lookup di semua merek/tipe yang dikenal.
+      "brand"      : [tipe, kerusakan]  (merek tidak dikenal)
+      "tier"       : [merek, kerusakan] (tipe tidak dikenal)
+      "brand+tier" : [kerusakan]        (keduanya tidak dikenal)
+    """
+    return {
+        "brand": _majority(table, 0, n_classes),
+        "tier": _majority(table, 1, n_classes),
+        "brand+tier": _majority(table, (0, 1), n_classes),
+    }
+
+
+def compile_model_arrays(model, encoders):
+    """
+    Semua array yang dibutuhkan untuk serving: tabel lookup, tabel fallback,
+    dan (untuk decision tree tunggal) array node tree.
+    """
+    n_classes = len(encoders["KATEGORI_BIAYA"].classes_)
+    code_dtype = np.min_scalar_type(n_classes)
+
+    lookup = compile_lookup_table(model, encoders)
+    fallback = compile_fallback_tables(lookup, n_classes)
+    arrays = {
+        "lookup": lookup.astype(code_dtype),
+        "fallback_brand": fallback["brand"].astype(code_dtype),
+        "fallback_tier": fallback["tier"].astype(code_dtype),
+        "fallback_brand_tier": fallback["brand+tier"].astype(code_dtype),
+    }
+
+    if hasattr(model, "tree_"):
+        tree = model.tree_
+        arrays.update(
+            tree_children_left=tree.children_left,
+            tree_children_right=tree.children_right,
+            tree_feature=tree.feature,
+            tree_threshold=tree.threshold,
+            tree_value=tree.value[:, 0, :],
+            tree_n_node_samples=tree.n_node_samples,
+        )
+    return arrays
@@ -0,0 +1,60 @@
+import numpy as np
+from services.compiled_model import _feature_grid, _traverse
+
+# Kuantil biaya yang disimpan per kombinasi: batas bawah, median, batas atas
+QUANTILES = (0.1, 0.5, 0.9)
+# Jumlah data minimum per leaf tree regresi
+MIN_SAMPLES_LEAF = 5
+
+
+def fit_cost_model(X, biaya, min_samples_leaf=MIN_SAMPLES_LEAF):
+    """
+    Regresi biaya (Rupiah) dari fitur yang sama dengan classifier.
+    Tree regresi membagi data jadi leaf; setiap leaf menyimpan kuantil
+    BIAYA training di leaf itu (bukan hanya rata-rata).
+    Return (model, tabel kuantil per node [n_node, len(QUANTILES)]).
+    """
+    # sklearn hanya untuk training; serving cukup memakai QUANTILES dari modul ini
+    from sklearn.tree import DecisionTreeRegressor
+
+    model = DecisionTreeRegressor(min_samples_leaf=min_samples_leaf, random_state=42)
+    model.fit(X, biaya)
+
+    leaves = _traverse(model.tree_, np.asarray(X))
+    biaya = np.asarray(biaya, dtype=np.float64)
+    order = np.argsort(leaves, kind="stable")
+    leaf_ids, starts = np.unique(leaves[order], return_index=True)
+
+    node_quantiles = np.zeros((model.tree_.node_count, len(QUANTILES)), dtype=np.float32)
+    for leaf, group in zip(leaf_ids, np.split(biaya[order], starts[1:])):
+        node_quantiles[leaf] = np.quantile(group, QUANTILES)
+    return model, node_quantiles
+
+
+def compile_cost_table(model, node_quantiles, shape):
+    """Tabel dense [merek, tipe, kerusakan, kuantil] dari tree regresi"""
+    leaves = _traverse(model.tree_, _feature_grid(shape))
+    return node_quantiles[leaves].reshape(*shape, len(QUANTILES))
+
+
+def compile_cost_fallback_tables(table):
+    """
+    Kuantil untuk merek dan/atau tipe yang tidak dikenal: median tabel di
+    semua merek/tipe yang dikenal (key sama dengan compile_fallback_tables).
+    """
+    return {
+        "brand": np.median(table, axis=0).astype(np.float32),
+        "tier": np.median(table, axis=1).astype(np.float32),
+        "brand+tier": np.median(table, axis=(0, 1)).astype(np.float32),
+    }
+
+
+def evaluate_cost_table(table, X, biaya):
+    """MAE median dan cakupan rentang P10-P90 pada data uji"""
+    X = np.asarray(X)
+    biaya = np.asarray(biaya, dtype=np.float64)
+    q = table[X[:, 0], X[:, 1], X[:, 2]]
+    return {
+        "mae": float(np.abs(q[:, 1] - biaya).mean()),
+        "coverage": float(((q[:, 0] <= biaya) & (biaya <= q[:, -1])).mean()),
+    }
@@ -1,17 +1,57 @@
-from flask import jsonify
-import joblib
-import numpy as np
-from utils.preprocessing import preprocess_input
-from utils.paths import MODEL_PATH, ENCODER_PATH
+from services.model_registry import get_snapshot
+from services.response_cache import get_response_cache
+from utils.log import get_logger, sampled
+from utils.metrics import ESTIMATE_STAGE_SECONDS
+from utils.waktu_kategori import WAKTU_MENIT
+from services.cost_model import QUANTILES
+from services.stats_service import record_estimate, maybe_shadow
+from utils.paths import check_branch
 
-def estimate_service(data):
+logger = get_logger(__name__)
+
+# Range biaya berdasarkan kategori
+BIAYA_RANGE = {
+    "Murah": "Rp. 0 - 250.000",
+    "Sedang": "Rp. 250.001 - 500.000",
+    "Mahal": "> Rp. 500.000"
+}
+
+# Kategori untuk kerusakan yang tidak ada di data training
+UNKNOWN_CATEGORY = "Tidak diketahui"
+
+# Range biaya di response -> nama kelas model (untuk statistik /stats)
+_CLASS_BY_RANGE = {v: k for k, v in BIAYA_RANGE.items()}
+
+# Nama field kuantil biaya di response: 0.1 -> "p10"
+COST_KEYS = tuple(f"p{round(q * 100)}" for q in QUANTILES)
+
+def _load_model(branch):
+    """Snapshot + cache response model cabang (None = model default)"""
+    with ESTIMATE_STAGE_SECONDS.time("model"):
+        snapshot = get_snapshot(branch)
+        cache = get_response_cache(snapshot, _build_result) if snapshot is not None else None
+    return snapshot, cache
+
+
+def _not_trained(branch):
+    return {
+        "success": False,
+        "message": "Model belum dilatih" if branch is None else f"Model cabang {branch} belum dilatih"
+    }
+
+
+def estimate_service(data, branch=None):
 
     # Ambil input user
     brand = data.get("brand")
     tipe = data.get("type")
     damage = data.get("damage")
+    # Cabang dari field "branch" (atau header X-Branch, lewat parameter)
+    branch = data.get("branch") or branch
 
-    print("Estimating for:", brand, tipe, damage)
+    log_this = sampled(logger)
+    if log_this:
+        logger.debug("Estimating for: %s %s %s", brand, tipe, damage)
 
     if not brand or not tipe or not damage:
         return {
@@ -19,63 +59,143 @@ def estimate_service(data):
             "message": "brand, type, dan damage wajib diisi"
         }
 
-    # 🔥 Preprocessing sama dengan training
-    brand_clean, tipe_clean, damage_clean, waktu_estimasi, kategori_wkt  = preprocess_input(brand, tipe, damage)
+    try:
+        check_branch(branch)
+    except ValueError as e:
+        return {"success": False, "message": str(e)}
 
-    print("Preprocessed to:", brand_clean, tipe_clean, damage_clean)
     try:
-        # Load model & encoders
-        model = joblib.load(MODEL_PATH)
-        encoders = joblib.load(ENCODER_PATH)
+        # Ambil model & encoders dari registry (sudah ada di memori)
+        snapshot, cache = _load_model(branch)
     except Exception as e:
+        logger.exception("Gagal memuat model")
         return {
             "success": False,
             "message": f"Model belum dilatih: {e}"
         }
 
-    try:
-        # Encode input sesuai model
-        brand_encoded = encoders["MEREK"].transform([brand_clean])[0]
-        tipe_encoded = encoders["TIPE UNIT"].transform([tipe_clean])[0]
-        damage_encoded = encoders["KERUSAKAN"].transform([damage_clean])[0]
+    if snapshot is None:
+        return _not_trained(branch)
 
-      
+    # 🔥 Preprocessing sama dengan training (di-cache per input mentah)
+    with ESTIMATE_STAGE_SECONDS.time("preprocess"):
+        brand_clean, tipe_clean, damage_clean, waktu_estimasi, kategori_wkt  = cache.resolve(brand, tipe, damage)
 
-    except Exception:
-        return jsonify({
-            "success": False,
-            "message": "Data input belum dikenal oleh model (brand/tipe/damage tidak ada dalam training)"
-        }), 400
+    if log_this:
+        logger.debug("Preprocessed to: %s %s %s", brand_clean, tipe_clean, damage_clean)
 
-    # Bentuk array input model
-    input_array = np.array([[brand_encoded, tipe_encoded, damage_encoded]])
+    with ESTIMATE_STAGE_SECONDS.time("lookup"):
+        return _cached_result(cache, brand_clean, tipe, tipe_clean, damage_clean, kategori_wkt, branch=branch)
 
-    # Prediksi
-    pred_class = model.predict(input_array)[0]
-    pred_label = encoders["KATEGORI_BIAYA"].inverse_transform([pred_class])[0]
 
-    # Range biaya berdasarkan kategori
-    biaya_range = {
-        "Murah": "Rp. 0 - 250.000",
-        "Sedang": "Rp. 250.001 - 500.000",
-        "Mahal": "> Rp. 500.000"
-    }
+def _cached_result(cache, brand_clean, tipe, tipe_clean, damage_clean, kategori_wkt,
+                   record_stats=True, branch=None):
+    """
+    Response dari tabel yang sudah dihitung di depan. Input yang tidak dikenal
+    tidak melempar exception:
+    - merek/tipe tidak dikenal -> hasil voting semua merek/tipe (field "fallback")
+    - kerusakan tidak dikenal  -> kategori "Tidak diketahui"
+    """
+    cached = cache.response(brand_clean, tipe_clean, damage_clean)
+    if cached is not None:
+        result = {**cached, "brand": brand_clean, "type": tipe}
+    else:
+        result = _build_result(None, brand_clean, tipe, damage_clean, kategori_wkt)
+        result["estimated_cost_category"] = UNKNOWN_CATEGORY
+        result["fallback"] = [
+            name for name, known in (
+                ("brand", brand_clean in cache.brands),
+                ("type", tipe_clean in cache.tipes),
+                ("damage", False),
+            ) if not known
+        ]
 
-    return {
+    # Statistik /stats dan model kandidat (shadow) hanya untuk model default:
+    # trafik cabang dibandingkan dengan sebaran training default akan mengacaukan drift
+    if record_stats and branch is None:
+        cost_class = _CLASS_BY_RANGE.get(result["estimated_cost_category"], UNKNOWN_CATEGORY)
+        record_estimate(
+            brand_clean in cache.brands, tipe_clean in cache.tipes, cached is not None,
+            tipe_clean, cost_class,
+        )
+        maybe_shadow(brand_clean, tipe_clean, damage_clean, cost_class)
+    return result
+
+
+def _build_result(pred_label, brand_clean, tipe, damage_clean, kategori_wkt, cost=None):
+    result = {
         "success": True,
         # "estimated_cost_category": pred_label,
-        "estimated_cost_category": biaya_range.get(pred_label, "Unknown"),
+        "estimated_cost_category": BIAYA_RANGE.get(pred_label, "Unknown"),
         "brand": brand_clean,
         "type": tipe,
         "damage": damage_clean,
         # "estimated_time": waktu_estimasi,
         "estimated_time": kategori_wkt,
-        
-
-            # "success": True,
-            # "brand": brand_clean,
-            # "type": tipe_clean,
-            # "damage": damage_clean,
-            # "estimated_cost_category": pred_label,
-            # "estimated_time": "Unknown"
+    }
+
+    menit = WAKTU_MENIT.get(damage_clean)
+    if menit is not None:
+        result["estimated_time_minutes"] = {"min": menit[0], "max": menit[1]}
+
+    # Model mode regresi: estimasi biaya dalam Rupiah (median + rentang kuantil)
+    if cost is not None:
+        result["estimated_cost"] = {key: int(round(float(v))) for key, v in zip(COST_KEYS, cost)}
+    return result
+
+
+def warm_up(branch=None):
+    """Muat model dan tabel response sekarang (mis. di master gunicorn sebelum fork)"""
+    snapshot, _ = _load_model(branch)
+    return snapshot
+
+
+def estimate_batch_service(rows, record_stats=True, branch=None):
+    """
+    Estimasi banyak data sekaligus.
+    Preprocessing per baris (di-cache), lalu response diambil dari tabel per versi model.
+    Error dicatat per baris sehingga satu data salah tidak menggagalkan seluruh batch.
+    record_stats=False untuk scoring offline (tidak dihitung sebagai trafik live di /stats).
+    Satu batch memakai satu model (branch = cabang, None = model default).
+    """
+    try:
+        check_branch(branch)
+    except ValueError as e:
+        return {"success": False, "message": str(e)}
+
+    snapshot, cache = _load_model(branch)
+    if snapshot is None:
+        return _not_trained(branch)
+
+    results = []
+    for data in rows:
+        if isinstance(data, Exception):
+            results.append({"success": False, "message": f"Data tidak valid: {data}"})
+            continue
+        if not isinstance(data, dict):
+            results.append({"success": False, "message": "Setiap data harus berupa object"})
+            continue
+
+        brand = data.get("brand")
+        tipe = data.get("type")
+        damage = data.get("damage")
+        if not brand or not tipe or not damage:
+            results.append({"success": False, "message": "brand, type, dan damage wajib diisi"})
+            continue
+
+        try:
+            brand_clean, tipe_clean, damage_clean, waktu_estimasi, kategori_wkt = cache.resolve(brand, tipe, damage)
+        except Exception as e:
+            results.append({"success": False, "message": f"Data tidak valid: {e}"})
+            continue
+
+        results.append(_cached_result(
+            cache, brand_clean, tipe, tipe_clean, damage_clean, kategori_wkt, record_stats, branch
+        ))
+
+    return {
+        "success": True,
+        "total": len(results),
+        "failed": sum(1 for r in results if not r["success"]),
+        "results": results,
     }
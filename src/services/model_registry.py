@@ -0,0 +1,339 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+from utils.paths import MODEL_PATH, ENCODER_PATH, BUNDLE_PATH, for_branch
+from services.artifact import read_bundle
+from services.compiled_model import FEATURE_COLUMNS, compile_model_arrays
+
+CLASS_COLUMNS = FEATURE_COLUMNS + ["KATEGORI_BIAYA"]
+
+# Atribut di model.pkl berisi versi bundle yang ditulis bersamanya
+BUNDLE_VERSION_ATTR = "bundle_version_"
+
+
+class StaleModelError(RuntimeError):
+    """model.pkl di disk bukan model yang sama dengan bundle snapshot"""
+
+
+class ModelSnapshot:
+    """
+    Satu versi model yang siap dipakai serving, tidak pernah diubah setelah dibuat.
+    Serving hanya butuh daftar kelas + tabel lookup (lihat compiled_model);
+    model sklearn hanya dimuat kalau diminta (mis. untuk gambar tree).
+    """
+
+    def __init__(self, version, classes, arrays, manifest=None, model=None, model_path=MODEL_PATH):
+        self.version = version
+        self.manifest = manifest or {}
+        self.classes = classes
+        self._model = model
+        self._model_path = model_path
+
+        # Tabel [merek, tipe, kerusakan] -> kode kelas; request tidak perlu memanggil sklearn
+        self.lookup = arrays["lookup"]
+        self.fallback = {
+            "brand": arrays["fallback_brand"],
+            "tier": arrays["fallback_tier"],
+            "brand+tier": arrays["fallback_brand_tier"],
+        }
+        # Kuantil biaya [merek, tipe, kerusakan, kuantil] (hanya model mode regresi)
+        self.cost_quantiles = arrays.get("cost_quantiles")
+        self.cost_fallback = None
+        if self.cost_quantiles is not None:
+            self.cost_fallback = {
+                "brand": arrays["cost_fallback_brand"],
+                "tier": arrays["cost_fallback_tier"],
+                "brand+tier": arrays["cost_fallback_brand_tier"],
+            }
+        # Array node decision tree (None untuk ensemble)
+        self.tree = None
+        if "tree_children_left" in arrays:
+            self.tree = {
+                name[len("tree_"):]: a for name, a in arrays.items() if name.startswith("tree_")
+            }
+
+        # Ukuran array (untuk batas memori pool model per cabang)
+        self.nbytes = sum(a.nbytes for a in arrays.values())
+        # Diisi services.response_cache saat pertama kali dipakai
+        self.response_cache = None
+
+        self.cost_labels = np.asarray(classes["KATEGORI_BIAYA"], dtype=object)
+        # Encoder berbasis dict: nilai -> kode, tanpa exception untuk nilai baru
+        self.codes = {
+            col: {value: i for i, value in enumerate(classes[col])}
+            for col in FEATURE_COLUMNS
+        }
+
+    @classmethod
+    def from_model(cls, model, encoders, version, manifest=None):
+        classes = {col: [str(c) for c in encoders[col].classes_] for col in CLASS_COLUMNS}
+        return cls(version, classes, compile_model_arrays(model, encoders), manifest, model=model)
+
+    @classmethod
+    def from_bundle(cls, path, version, model_path=MODEL_PATH):
+        manifest, arrays = read_bundle(path)
+        return cls(version, manifest["classes"], arrays, manifest, model_path=model_path)
+
+    @property
+    def model(self):
+        """
+        Model sklearn (dimuat dari pickle saat pertama kali dibutuhkan).
+        Pickle ditulis terpisah dari bundle, jadi versinya dicek: StaleModelError
+        kalau model.pkl bukan pasangan bundle ini (mis. di antara dua penulisan).
+        """
+        if self._model is None:
+            if self._model_path is None:
+                raise StaleModelError("Model ini hanya tersedia sebagai bundle")
+            import joblib
+
+            model = joblib.load(self._model_path)
+            version = self.manifest.get("version")
+            if version is not None and getattr(model, BUNDLE_VERSION_ATTR, None) != version:
+                raise StaleModelError("model.pkl tidak sesuai dengan versi model aktif, coba lagi")
+            self._model = model
+        return self._model
+
+    def encode(self, brand, tipe, damage):
+        """Kode (merek, tipe, kerusakan); None untuk nilai yang tidak ada di training"""
+        return (
+            self.codes["MEREK"].get(brand),
+            self.codes["TIPE UNIT"].get(tipe),
+            self.codes["KERUSAKAN"].get(damage),
+        )
+
+    def predict_labels(self, brand_codes, tipe_codes, damage_codes):
+        """Label KATEGORI_BIAYA untuk kode fitur (skalar atau array)"""
+        return self.cost_labels[self.lookup[brand_codes, tipe_codes, damage_codes]]
+
+    def predict_label_fallback(self, brand_code, tipe_code, damage_code):
+        """
+        Label untuk satu input; merek/tipe None memakai tabel voting
+        (lihat compile_fallback_tables). Kerusakan wajib dikenal.
+        """
+        if brand_code is None and tipe_code is None:
+            cls = self.fallback["brand+tier"][damage_code]
+        elif brand_code is None:
+            cls = self.fallback["brand"][tipe_code, damage_code]
+        elif tipe_code is None:
+            cls = self.fallback["tier"][brand_code, damage_code]
+        else:
+            cls = self.lookup[brand_code, tipe_code, damage_code]
+        return self.cost_labels[cls]
+
+    def predict_cost_fallback(self, brand_code, tipe_code, damage_code):
+        """
+        Kuantil biaya (lihat cost_model.QUANTILES) untuk satu input, dengan
+        aturan fallback yang sama; None kalau model tidak punya mode regresi.
+        """
+        if self.cost_quantiles is None:
+            return None
+        if brand_code is None and tipe_code is None:
+            return self.cost_fallback["brand+tier"][damage_code]
+        if brand_code is None:
+            return self.cost_fallback["brand"][tipe_code, damage_code]
+        if tipe_code is None:
+            return self.cost_fallback["tier"][brand_code, damage_code]
+        return self.cost_quantiles[brand_code, tipe_code, damage_code]
+
+
+class ModelRegistry:
+    """
+    Menyimpan model di memori (sekali per worker gunicorn).
+
+    Sumber utama adalah bundle (model/model.bundle) yang ditulis atomic oleh
+    training dan di-mmap read-only; kalau belum ada, pickle lama
+    (model.pkl + encoders.pkl) yang dipakai. Setiap `get()` hanya melakukan
+    os.stat; kalau file berubah (mis. setelah /train, dari worker mana pun)
+    snapshot baru dimuat lalu referensinya diganti sekaligus. Request yang
+    sedang berjalan tetap memakai snapshot yang sudah diambilnya.
+    """
+
+    def __init__(self, bundle_path=BUNDLE_PATH, model_path=MODEL_PATH, encoder_path=ENCODER_PATH):
+        self.bundle_path = bundle_path
+        self.model_path = model_path
+        self.encoder_path = encoder_path
+        self._snapshot = None
+        self._lock = threading.Lock()
+
+    def _current_version(self):
+        try:
+            st = os.stat(self.bundle_path)
+            return ("bundle", st.st_mtime_ns, st.st_ino)
+        except FileNotFoundError:
+            pass
+        if self.model_path is None:
+            # Registry khusus bundle (mis. model kandidat), tanpa fallback pickle
+            return None
+        try:
+            return (
+                "pickle",
+                os.stat(self.model_path).st_mtime_ns,
+                os.stat(self.encoder_path).st_mtime_ns,
+            )
+        except FileNotFoundError:
+            return None
+
+    def exists(self):
+        """Sudah ada model (bundle atau pickle) di disk"""
+        return self._current_version() is not None
+
+    def get(self):
+        """Ambil snapshot terbaru, atau None kalau model belum dilatih"""
+        version = self._current_version()
+        snapshot = self._snapshot
+        if version is None:
+            return snapshot
+        if snapshot is not None and snapshot.version == version:
+            return snapshot
+
+        with self._lock:
+            # Cek ulang: thread lain mungkin sudah memuat versi ini
+            snapshot = self._snapshot
+            if snapshot is not None and snapshot.version == version:
+                return snapshot
+            return self._load(version)
+
+    def reload(self):
+        """Paksa muat ulang dari disk (dipanggil setelah training)"""
+        with self._lock:
+            version = self._current_version()
+            if version is None:
+                return self._snapshot
+            return self._load(version)
+
+    def nbytes(self):
+        """Perkiraan memori snapshot yang sedang dipegang (array + cache response)"""
+        snapshot = self._snapshot
+        if snapshot is None:
+            return 0
+        cache = snapshot.response_cache
+        return snapshot.nbytes + (cache.nbytes if cache is not None else 0)
+
+    def _load(self, version):
+        if version[0] == "bundle":
+            snapshot = ModelSnapshot.from_bundle(self.bundle_path, version, self.model_path)
+        else:
+            import joblib
+
+            model = joblib.load(self.model_path)
+            encoders = joblib.load(self.encoder_path)
+            snapshot = ModelSnapshot.from_model(model, encoders, version)
+        self._snapshot = snapshot
+        return snapshot
+
+
+registry = ModelRegistry()
+
+# Batas memori model cabang yang dimuat per worker (model default tidak dihitung)
+MODEL_POOL_BYTES = int(os.environ.get("MODEL_POOL_BYTES", str(256 * 1024 * 1024)))
+# Batas jumlah cabang di pool per worker
+MODEL_POOL_BRANCHES = int(os.environ.get("MODEL_POOL_BRANCHES", "64"))
+# Memori pool dicek paling sering sekali per interval ini (cache response ikut tumbuh),
+# selain setiap kali cabang baru masuk pool
+POOL_EVICT_INTERVAL = 1.0
+
+
+class RegistryPool:
+    """
+    Registry per cabang (tenant), dimasukkan ke pool saat cabang yang sudah
+    punya model pertama kali diminta. Cabang yang paling lama tidak dipakai
+    dilepas kalau jumlah cabang melebihi max_branches atau total memori
+    melebihi max_bytes; cabang yang sedang diminta tidak pernah dilepas.
+    Memuat model satu cabang hanya memakai lock registry cabang itu.
+    """
+
+    def __init__(self, max_bytes=MODEL_POOL_BYTES, max_branches=MODEL_POOL_BRANCHES):
+        self.max_bytes = max_bytes
+        self.max_branches = max_branches
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._check_due = False
+        self._last_check = 0.0
+        self.evictions = 0
+
+    def registry(self, branch):
+        with self._lock:
+            entry = self._entries.get(branch)
+            if entry is not None:
+                self._entries.move_to_end(branch)
+                return entry
+
+        entry = ModelRegistry(
+            for_branch(BUNDLE_PATH, branch),
+            for_branch(MODEL_PATH, branch),
+            for_branch(ENCODER_PATH, branch),
+        )
+        if not entry.exists():
+            # Cabang belum dilatih: tidak disimpan, jadi X-Branch sembarang tidak menambah pool
+            return entry
+
+        with self._lock:
+            entry = self._entries.setdefault(branch, entry)
+            self._entries.move_to_end(branch)
+            while len(self._entries) > self.max_branches:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+            self._check_due = True
+        return entry
+
+    def evict(self, keep=None):
+        """
+        Lepas cabang LRU sampai total memori <= max_bytes. Ukuran dihitung di
+        luar lock pool, dan hanya kalau ada cabang baru atau interval sudah lewat.
+        """
+        now = time.monotonic()
+        with self._lock:
+            if not self._check_due and now - self._last_check < POOL_EVICT_INTERVAL:
+                return
+            self._check_due = False
+            self._last_check = now
+            entries = list(self._entries.items())
+
+        sizes = {branch: entry.nbytes() for branch, entry in entries}
+        total = sum(sizes.values())
+        if total <= self.max_bytes:
+            return
+        with self._lock:
+            for branch in list(self._entries):
+                if total <= self.max_bytes:
+                    break
+                if branch == keep or branch not in sizes:
+                    continue
+                del self._entries[branch]
+                total -= sizes[branch]
+                self.evictions += 1
+
+    def stats(self):
+        with self._lock:
+            entries = list(self._entries.items())
+        branches = {branch: entry.nbytes() for branch, entry in entries}
+        return {
+            "branches": branches,
+            "bytes": sum(branches.values()),
+            "max_bytes": self.max_bytes,
+            "evictions": self.evictions,
+        }
+
+
+_pool = RegistryPool()
+
+
+def get_registry(branch=None):
+    """Registry untuk cabang ini (None = model default); ValueError kalau nama cabang tidak valid"""
+    if branch is None:
+        return registry
+    return _pool.registry(branch)
+
+
+def get_snapshot(branch=None):
+    """Snapshot terbaru model cabang, lalu rapikan pool kalau melebihi batas memori"""
+    snapshot = get_registry(branch).get()
+    if branch is not None:
+        _pool.evict(keep=branch)
+    return snapshot
+
+
+def registry_pool_stats():
+    return _pool.stats()
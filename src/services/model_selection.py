@@ -0,0 +1,99 @@
+import os
+import time
+from joblib import Parallel, delayed
+from sklearn.base import clone
+from sklearn.ensemble import ExtraTreesClassifier, RandomForestClassifier
+from sklearn.model_selection import ParameterGrid, StratifiedKFold
+from sklearn.tree import DecisionTreeClassifier
+
+# Kandidat model: (nama, estimator dasar, grid parameter)
+SEARCH_SPACE = [
+    (
+        "decision_tree",
+        DecisionTreeClassifier(random_state=42),
+        {
+            "criterion": ["entropy", "gini"],
+            "max_depth": [None, 4, 6, 8, 12],
+            "min_samples_leaf": [1, 2, 5, 10],
+        },
+    ),
+    (
+        "random_forest",
+        RandomForestClassifier(n_estimators=100, random_state=42, n_jobs=1),
+        {
+            "max_depth": [None, 8],
+            "min_samples_leaf": [1, 5],
+        },
+    ),
+    (
+        "extra_trees",
+        ExtraTreesClassifier(n_estimators=100, random_state=42, n_jobs=1),
+        {
+            "max_depth": [None, 8],
+        },
+    ),
+]
+
+
+def candidates(search_space=SEARCH_SPACE):
+    for name, base, grid in search_space:
+        for params in ParameterGrid(grid):
+            yield name, clone(base).set_params(**params), params
+
+
+def _fit_fold(estimator, X, y, train_idx, test_idx):
+    start = time.perf_counter()
+    model = clone(estimator).fit(X[train_idx], y[train_idx])
+    fit_seconds = time.perf_counter() - start
+    score = float((model.predict(X[test_idx]) == y[test_idx]).mean())
+    return score, fit_seconds, time.perf_counter() - start
+
+
+def search_model(X, y, n_splits=5, n_jobs=-1, search_space=SEARCH_SPACE):
+    """
+    Stratified k-fold CV untuk semua kandidat, (kandidat x fold) dijalankan
+    paralel di semua core (joblib/loky). X dan y sudah di-encode sekali dan
+    dipakai bersama oleh semua task (array besar di-memmap oleh loky).
+
+    Return (estimator terbaik (belum di-fit), laporan).
+    """
+    X = X.to_numpy() if hasattr(X, "to_numpy") else X
+    y = y.to_numpy() if hasattr(y, "to_numpy") else y
+
+    folds = list(StratifiedKFold(n_splits=n_splits, shuffle=True, random_state=42).split(X, y))
+    cands = list(candidates(search_space))
+
+    start = time.perf_counter()
+    scores = Parallel(n_jobs=n_jobs, backend="loky")(
+        delayed(_fit_fold)(estimator, X, y, train_idx, test_idx)
+        for _, estimator, _ in cands
+        for train_idx, test_idx in folds
+    )
+    wall = time.perf_counter() - start
+
+    report = []
+    for i, (name, estimator, params) in enumerate(cands):
+        fold_scores = scores[i * n_splits:(i + 1) * n_splits]
+        accs = [s[0] for s in fold_scores]
+        report.append({
+            "model": name,
+            "params": {k: v for k, v in params.items()},
+            "cv_accuracy_mean": sum(accs) / len(accs),
+            "cv_accuracy_min": min(accs),
+            "fit_seconds": sum(s[1] for s in fold_scores),
+            "seconds": sum(s[2] for s in fold_scores),
+        })
+
+    # Akurasi rata-rata tertinggi; kalau seri, yang paling cepat
+    best_i = max(range(len(report)), key=lambda i: (report[i]["cv_accuracy_mean"], -report[i]["seconds"]))
+    serial = sum(r["seconds"] for r in report)
+
+    return cands[best_i][1], {
+        "best": report[best_i],
+        "candidates": report,
+        "n_splits": n_splits,
+        "n_jobs": n_jobs if n_jobs > 0 else os.cpu_count(),
+        "wall_seconds": wall,
+        "serial_seconds": serial,
+        "speedup": serial / wall if wall else None,
+    }
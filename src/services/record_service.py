@@ -0,0 +1,82 @@
+import math
+from utils.paths import check_branch
+
+
+def _records_branch(rows, branch=None):
+    """
+    Cabang tujuan: dari header/query (branch) kalau ada, selain itu dari field
+    "branch" record. Record untuk cabang berbeda dalam satu request -> ValueError.
+    """
+    if branch is not None:
+        return check_branch(branch)
+    branches = {
+        data["branch"] for data in rows
+        if isinstance(data, dict) and data.get("branch") is not None
+    }
+    if len(branches) > 1:
+        raise ValueError("Semua data dalam satu request harus untuk cabang yang sama")
+    return check_branch(branches.pop() if branches else None)
+
+
+def append_records_service(rows, branch=None):
+    """
+    Tambah data servis baru untuk training berikutnya (branch = cabang dari
+    header/query, None = ikut field "branch" data, atau data default).
+    Setiap data: {"brand", "type", "damage", "cost", "branch" (opsional)}. Hanya
+    data baru yang dipreprocessing; /train berikutnya tinggal melakukan fit.
+    ValueError kalau cabang tidak valid atau data berisi cabang yang berbeda-beda.
+    """
+    branch = _records_branch(rows, branch)
+    valid = []
+    rejected = []
+
+    for i, data in enumerate(rows):
+        if not isinstance(data, dict):
+            rejected.append({"index": i, "message": "Setiap data harus berupa object"})
+            continue
+
+        brand = data.get("brand")
+        tipe = data.get("type")
+        damage = data.get("damage")
+        cost = data.get("cost")
+
+        if data.get("branch") is not None and data["branch"] != branch:
+            rejected.append({"index": i, "message": f"branch data tidak sama dengan cabang request ({branch})"})
+            continue
+        if not brand or not tipe or not damage or cost is None:
+            rejected.append({"index": i, "message": "brand, type, damage, dan cost wajib diisi"})
+            continue
+        if (
+            isinstance(cost, bool) or not isinstance(cost, (int, float))
+            or not math.isfinite(cost) or cost <= 0
+        ):
+            rejected.append({"index": i, "message": "cost harus berupa angka lebih dari 0"})
+            continue
+
+        valid.append((i, str(brand), str(tipe), str(damage), cost))
+
+    accepted = 0
+    if valid:
+        # pandas + record store baru di-import di sini (tidak dibutuhkan serving /estimate)
+        import pandas as pd
+        from utils.record_store import append_records
+
+        index, brands, tipes, damages, costs = zip(*valid)
+        df = pd.DataFrame(
+            {"MEREK": brands, "TIPE UNIT": tipes, "KERUSAKAN": damages, "BIAYA": costs},
+            index=list(index),
+        )
+        processed = append_records(df, branch)
+        accepted = len(processed)
+
+        # Baris yang dibuang saat preprocessing (mis. mengandung '?', ',', '+')
+        for i in df.index.difference(processed.index):
+            rejected.append({"index": int(i), "message": "Data tidak valid untuk training"})
+
+    rejected.sort(key=lambda r: r["index"])
+    return {
+        "success": True,
+        "branch": branch,
+        "accepted": accepted,
+        "rejected": rejected,
+    }
@@ -0,0 +1,112 @@
+import sys
+import threading
+from functools import lru_cache
+from utils.input_preprocessing import preprocess_input
+from utils.waktu_mapping import waktu_mapping
+
+RESOLVE_CACHE_SIZE = 8192
+
+
+class ResponseCache:
+    """
+    Semua response /estimate untuk satu versi model, dihitung di depan.
+
+    - responses: (brand, tipe, damage) hasil preprocessing -> isi response
+      (tanpa "brand"/"type", karena field itu memakai input user).
+      Merek/tipe yang tidak dikenal model disimpan dengan key None
+      (hasil voting, lihat ModelSnapshot.predict_label_fallback).
+    - resolve: LRU input mentah -> hasil preprocess_input
+    """
+
+    def __init__(self, snapshot, build_result, maxsize=RESOLVE_CACHE_SIZE):
+        self.version = snapshot.version
+        self.brands = snapshot.codes["MEREK"]
+        self.tipes = snapshot.codes["TIPE UNIT"]
+        self.responses = self._materialize(snapshot, build_result)
+        # Perkiraan memori tabel response (dict + isi; string yang sama dipakai bersama)
+        self.nbytes = sys.getsizeof(self.responses) + sum(
+            sys.getsizeof(key) + sys.getsizeof(response) for key, response in self.responses.items()
+        )
+        self.resolve = lru_cache(maxsize=maxsize)(preprocess_input)
+        self.hits = 0
+        self.fallbacks = 0
+        self.misses = 0
+
+    def _materialize(self, snapshot, build_result):
+        brands = list(self.brands.items()) + [(None, None)]
+        tipes = list(self.tipes.items()) + [(None, None)]
+
+        responses = {}
+        for damage, d in snapshot.codes["KERUSAKAN"].items():
+            # Sama dengan waktu estimasi di preprocess_input
+            waktu_estimasi = waktu_mapping.get(damage, "Tidak diketahui")
+            for brand, b in brands:
+                for tipe, t in tipes:
+                    label = snapshot.predict_label_fallback(b, t, d)
+                    cost = snapshot.predict_cost_fallback(b, t, d)
+                    response = build_result(label, brand, None, damage, waktu_estimasi, cost)
+                    del response["brand"], response["type"]
+
+                    unknown = [name for name, code in (("brand", b), ("type", t)) if code is None]
+                    if unknown:
+                        response["fallback"] = unknown
+                    responses[(brand, tipe, damage)] = response
+        return responses
+
+    def response(self, brand_clean, tipe_clean, damage_clean):
+        """
+        Response yang sudah jadi (tanpa brand/type), atau None kalau
+        kerusakan tidak dikenal model.
+        """
+        response = self.responses.get((brand_clean, tipe_clean, damage_clean))
+        if response is not None:
+            self.hits += 1
+            return response
+
+        brand_key = brand_clean if brand_clean in self.brands else None
+        tipe_key = tipe_clean if tipe_clean in self.tipes else None
+        response = self.responses.get((brand_key, tipe_key, damage_clean))
+        if response is not None:
+            self.fallbacks += 1
+        else:
+            self.misses += 1
+        return response
+
+    def stats(self):
+        info = self.resolve.cache_info()
+        return {
+            "model_version": list(self.version),
+            "responses": len(self.responses),
+            "bytes": self.nbytes,
+            "response_hits": self.hits,
+            "response_fallbacks": self.fallbacks,
+            "response_misses": self.misses,
+            "resolve_hits": info.hits,
+            "resolve_misses": info.misses,
+            "resolve_size": info.currsize,
+            "resolve_maxsize": info.maxsize,
+        }
+
+
+_lock = threading.Lock()
+
+
+def get_response_cache(snapshot, build_result):
+    """
+    Cache untuk snapshot ini (disimpan di snapshot, jadi tiap cabang/versi model
+    punya cache sendiri dan ikut dilepas bersama snapshot-nya)
+    """
+    cache = snapshot.response_cache
+    if cache is not None:
+        return cache
+
+    with _lock:
+        if snapshot.response_cache is None:
+            snapshot.response_cache = ResponseCache(snapshot, build_result)
+    return snapshot.response_cache
+
+
+def response_cache_stats(snapshot):
+    if snapshot is None or snapshot.response_cache is None:
+        return None
+    return snapshot.response_cache.stats()
@@ -0,0 +1,133 @@
+import csv
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from services.estimate_service import estimate_batch_service, warm_up, COST_KEYS
+from utils.ingest import iter_chunks
+
+SCORE_CHUNK_ROWS = 5000
+
+# Nama kolom file input -> field payload /estimate (file bentuk dataset.xlsx)
+INPUT_ALIASES = {"MEREK": "brand", "TIPE UNIT": "type", "KERUSAKAN": "damage"}
+
+CSV_FIELDS = (
+    ["row", "success", "message", "brand", "type", "damage",
+     "estimated_cost_category", "estimated_time",
+     "estimated_time_minutes.min", "estimated_time_minutes.max"]
+    + [f"estimated_cost.{key}" for key in COST_KEYS]
+    + ["fallback"]
+)
+
+
+def _payloads(chunk):
+    """DataFrame chunk -> list payload {"brand", "type", "damage"} (nilai kosong -> None)"""
+    chunk = chunk.rename(columns=INPUT_ALIASES)
+    columns = [chunk.get(f, [None] * len(chunk)) for f in ("brand", "type", "damage")]
+    rows = []
+    for brand, tipe, damage in zip(*columns):
+        rows.append({
+            "brand": None if _is_blank(brand) else str(brand),
+            "type": None if _is_blank(tipe) else str(tipe),
+            "damage": None if _is_blank(damage) else str(damage),
+        })
+    return rows
+
+
+def _is_blank(value):
+    return value is None or value != value
+
+
+def _score_rows(rows):
+    """Dijalankan di worker: jalur yang sama dengan POST /estimate/batch"""
+    result = estimate_batch_service(rows, record_stats=False)
+    if not result["success"]:
+        raise RuntimeError(result["message"])
+    return result["results"]
+
+
+def _flatten(result):
+    row = {}
+    for key, value in result.items():
+        if isinstance(value, dict):
+            for sub, v in value.items():
+                row[f"{key}.{sub}"] = v
+        elif isinstance(value, list):
+            row[key] = ",".join(value)
+        else:
+            row[key] = value
+    return row
+
+
+class _Writer:
+    """Tulis hasil per baris ke JSONL (default) atau CSV, sesuai ekstensi output"""
+
+    def __init__(self, f, path):
+        self.f = f
+        self.csv = None
+        if path.lower().endswith(".csv"):
+            self.csv = csv.DictWriter(f, fieldnames=CSV_FIELDS, extrasaction="ignore")
+            self.csv.writeheader()
+
+    def write(self, start, results):
+        for i, result in enumerate(results, start):
+            if self.csv is not None:
+                self.csv.writerow({"row": i, **_flatten(result)})
+            else:
+                self.f.write(json.dumps({"row": i, **result}, ensure_ascii=False) + "\n")
+
+
+def score_file(input_path, output_path, workers=None, chunksize=SCORE_CHUNK_ROWS):
+    """
+    Skor semua baris file (CSV/JSONL/Excel) lalu tulis hasilnya per chunk.
+    Paling banyak 2 chunk per worker yang sedang diproses/menunggu ditulis,
+    jadi memori tidak tergantung ukuran file. Urutan output = urutan input.
+    Return ringkasan (jumlah baris, gagal, durasi, baris/detik).
+    """
+    snapshot = warm_up()
+    if snapshot is None:
+        raise RuntimeError("Model belum dilatih")
+
+    workers = os.cpu_count() if workers is None else workers
+    started = time.perf_counter()
+    total = failed = 0
+
+    out_dir = os.path.dirname(output_path)
+    if out_dir:
+        os.makedirs(out_dir, exist_ok=True)
+
+    with open(output_path, "w", newline="") as f:
+        writer = _Writer(f, output_path)
+
+        def flush(results):
+            nonlocal total, failed
+            writer.write(total, results)
+            total += len(results)
+            failed += sum(1 for r in results if not r["success"])
+
+        chunks = (_payloads(chunk) for chunk in iter_chunks(input_path, chunksize, columns=None))
+        if workers <= 1:
+            for rows in chunks:
+                flush(_score_rows(rows))
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                pending = deque()
+                for rows in chunks:
+                    pending.append(pool.submit(_score_rows, rows))
+                    if len(pending) >= 2 * workers:
+                        flush(pending.popleft().result())
+                while pending:
+                    flush(pending.popleft().result())
+
+    seconds = time.perf_counter() - started
+    return {
+        "input": input_path,
+        "output": output_path,
+        "model_version": snapshot.manifest.get("version", list(snapshot.version)),
+        "workers": workers,
+        "rows": total,
+        "failed": failed,
+        "seconds": round(seconds, 3),
+        "rows_per_second": round(total / seconds, 1) if seconds > 0 else None,
+    }
@@ -0,0 +1,291 @@
+"""
+Statistik trafik /estimate untuk memantau drift terhadap data training.
+
+- Setiap thread menambah counter miliknya sendiri (tanpa lock di jalur request).
+- Thread background di setiap worker menulis total counternya ke
+  model/stats/worker-<pid>.json setiap STATS_FLUSH_SECONDS (bukan di jalur
+  request); GET /stats menjumlahkan file worker yang masih hidup + counter
+  worker yang sudah berhenti (dipindah ke retired.json, total tidak turun
+  saat gunicorn mengganti worker).
+- Shadow scoring (opsional, SHADOW_SAMPLE_RATE > 0): sebagian request juga
+  diprediksi model kandidat (model/candidate.bundle) di thread terpisah,
+  jadi response utama tidak menunggu.
+"""
+import fcntl
+import glob
+import json
+import os
+import random
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from services.model_registry import ModelRegistry
+from utils.log import get_logger
+from utils.paths import STATS_DIR, CANDIDATE_BUNDLE_PATH
+from utils.process import pid_alive
+
+logger = get_logger(__name__)
+
+STATS_FLUSH_SECONDS = float(os.environ.get("STATS_FLUSH_SECONDS", "10"))
+SHADOW_SAMPLE_RATE = float(os.environ.get("SHADOW_SAMPLE_RATE", "0"))
+# Antrian shadow maksimum; kalau penuh, sampel dibuang (dihitung "shadow_dropped")
+SHADOW_MAX_PENDING = 1000
+
+# Counter gabungan worker yang sudah berhenti
+RETIRED_FILE = "retired.json"
+LOCK_FILE = ".lock"
+
+
+class StatsCollector:
+    """Counter per thread; dijumlahkan hanya saat dibaca"""
+
+    def __init__(self):
+        self._local = threading.local()
+        self._all = []
+        self._lock = threading.Lock()
+        self.started_at = time.time()
+
+    def counters(self):
+        counters = getattr(self._local, "counters", None)
+        if counters is None:
+            counters = defaultdict(int)
+            # Lock hanya sekali per thread, saat counter baru didaftarkan
+            with self._lock:
+                self._all.append(counters)
+            self._local.counters = counters
+        return counters
+
+    def totals(self):
+        totals = defaultdict(int)
+        with self._lock:
+            all_counters = list(self._all)
+        for counters in all_counters:
+            for key, n in dict(counters).items():
+                totals[key] += n
+        return totals
+
+    def flush(self):
+        os.makedirs(STATS_DIR, exist_ok=True)
+        path = os.path.join(STATS_DIR, f"worker-{os.getpid()}.json")
+        tmp_path = f"{path}.tmp-{threading.get_ident()}"
+        with open(tmp_path, "w") as f:
+            json.dump({"started_at": self.started_at, "counters": self.totals()}, f)
+        os.replace(tmp_path, path)
+
+
+_stats = StatsCollector()
+_candidates = ModelRegistry(bundle_path=CANDIDATE_BUNDLE_PATH, model_path=None, encoder_path=None)
+_shadow_pool = None
+_shadow_pid = None
+_shadow_pending = 0
+_shadow_lock = threading.Lock()
+_flusher_started = False
+_flusher_lock = threading.Lock()
+
+
+def _flush_loop():
+    failing = False
+    while True:
+        time.sleep(STATS_FLUSH_SECONDS)
+        try:
+            _stats.flush()
+            failing = False
+        except OSError as e:
+            # Dicatat sekali per rangkaian kegagalan, bukan setiap interval
+            if not failing:
+                logger.warning("Gagal menulis statistik worker: %s", e)
+            failing = True
+
+
+def _ensure_flusher():
+    """Thread flush dibuat per proses saat request pertama (thread tidak ikut fork)"""
+    global _flusher_started
+    if _flusher_started:
+        return
+    with _flusher_lock:
+        if not _flusher_started:
+            threading.Thread(target=_flush_loop, name="stats-flush", daemon=True).start()
+            _flusher_started = True
+
+
+def _after_fork():
+    # Proses baru = worker baru: counter milik proses induk tidak ikut dihitung lagi
+    global _stats, _flusher_started, _flusher_lock
+    _stats = StatsCollector()
+    _flusher_started = False
+    _flusher_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_after_fork)
+
+
+def flush_stats():
+    """Tulis counter worker ini sekarang (mis. dari hook worker_exit gunicorn)"""
+    try:
+        _stats.flush()
+    except OSError as e:
+        logger.warning("Gagal menulis statistik worker: %s", e)
+
+
+def record_estimate(brand_known, type_known, damage_known, tier, cost_class):
+    """Catat satu hasil estimasi (dipanggil di jalur request, hanya operasi dict lokal)"""
+    c = _stats.counters()
+    c["requests"] += 1
+    if not brand_known:
+        c["unknown:brand"] += 1
+    if not type_known:
+        c["unknown:type"] += 1
+    if not damage_known:
+        c["unknown:damage"] += 1
+    c[f"tier:{tier}"] += 1
+    c[f"class:{cost_class}"] += 1
+    _ensure_flusher()
+
+
+def maybe_shadow(brand_clean, tipe_clean, damage_clean, cost_class):
+    """Kirim sampel ke model kandidat di background (kalau shadow aktif dan terpilih)"""
+    if SHADOW_SAMPLE_RATE <= 0 or random.random() >= SHADOW_SAMPLE_RATE:
+        return
+
+    global _shadow_pool, _shadow_pid, _shadow_pending
+    with _shadow_lock:
+        if _shadow_pending >= SHADOW_MAX_PENDING:
+            _stats.counters()["shadow_dropped"] += 1
+            return
+        # Thread tidak ikut ke proses hasil fork (preload gunicorn): buat per worker
+        if _shadow_pool is None or _shadow_pid != os.getpid():
+            _shadow_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="shadow")
+            _shadow_pid = os.getpid()
+        _shadow_pending += 1
+    _shadow_pool.submit(_score_shadow, brand_clean, tipe_clean, damage_clean, cost_class)
+
+
+def _score_shadow(brand_clean, tipe_clean, damage_clean, cost_class):
+    global _shadow_pending
+    try:
+        snapshot = _candidates.get()
+        if snapshot is None:
+            return
+        b, t, d = snapshot.encode(brand_clean, tipe_clean, damage_clean)
+        # Kerusakan yang tidak dikenal kandidat -> sama dengan jalur utama
+        candidate_class = cost_class if d is None else str(snapshot.predict_label_fallback(b, t, d))
+
+        c = _stats.counters()
+        c["shadow_scored"] += 1
+        if candidate_class == cost_class:
+            c["shadow_agree"] += 1
+        else:
+            c[f"shadow_change:{cost_class}->{candidate_class}"] += 1
+    except Exception:
+        logger.exception("Shadow scoring gagal")
+    finally:
+        with _shadow_lock:
+            _shadow_pending -= 1
+
+
+@contextmanager
+def _stats_lock():
+    """Lock antar worker untuk memindahkan counter worker yang berhenti ke retired.json"""
+    with open(os.path.join(STATS_DIR, LOCK_FILE), "w") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _read_counters(path):
+    try:
+        with open(path) as f:
+            return json.load(f)["counters"]
+    except FileNotFoundError:
+        return {}
+
+
+def _add(totals, counters):
+    for key, n in counters.items():
+        totals[key] += n
+
+
+def _merged_counters():
+    """
+    Counter semua worker (worker ini selalu yang terbaru). File worker yang
+    sudah berhenti dijumlahkan ke retired.json lalu dihapus, di bawah lock
+    supaya tidak terhitung dua kali.
+    """
+    _stats.flush()
+    totals = defaultdict(int)
+    workers = 0
+    with _stats_lock():
+        retired_path = os.path.join(STATS_DIR, RETIRED_FILE)
+        retired = defaultdict(int, _read_counters(retired_path))
+        stopped = []
+        for path in glob.glob(os.path.join(STATS_DIR, "worker-*.json")):
+            pid = int(os.path.basename(path)[len("worker-"):-len(".json")])
+            try:
+                counters = _read_counters(path)
+            except ValueError:
+                logger.warning("File statistik rusak: %s", path)
+                continue
+            if pid_alive(pid):
+                workers += 1
+                _add(totals, counters)
+            else:
+                _add(retired, counters)
+                stopped.append(path)
+
+        if stopped:
+            tmp_path = f"{retired_path}.tmp-{os.getpid()}"
+            with open(tmp_path, "w") as f:
+                json.dump({"counters": retired}, f)
+            os.replace(tmp_path, retired_path)
+            for path in stopped:
+                os.remove(path)
+    _add(totals, retired)
+    return totals, workers
+
+
+def _distribution(totals, prefix, training, total):
+    keys = {k[len(prefix):] for k in totals if k.startswith(prefix)} | set(training)
+    return {
+        key: {
+            "count": totals.get(prefix + key, 0),
+            "live": totals.get(prefix + key, 0) / total if total else 0.0,
+            "training": training.get(key, 0.0),
+        }
+        for key in sorted(keys)
+    }
+
+
+def stats_report(snapshot):
+    """Ringkasan untuk GET /stats: rasio input tidak dikenal, sebaran tier & kelas vs training"""
+    totals, workers = _merged_counters()
+    total = totals.get("requests", 0)
+    training = snapshot.manifest.get("distribution", {}) if snapshot is not None else {}
+
+    report = {
+        "workers": workers,
+        "requests": total,
+        "unknown_rate": {
+            name: totals.get(f"unknown:{name}", 0) / total if total else 0.0
+            for name in ("brand", "type", "damage")
+        },
+        "tier": _distribution(totals, "tier:", training.get("TIPE UNIT", {}), total),
+        "cost_class": _distribution(totals, "class:", training.get("KATEGORI_BIAYA", {}), total),
+    }
+
+    candidate = _candidates.get()
+    scored = totals.get("shadow_scored", 0)
+    report["shadow"] = {
+        "sample_rate": SHADOW_SAMPLE_RATE,
+        "candidate_version": candidate.manifest.get("version") if candidate is not None else None,
+        "scored": scored,
+        "dropped": totals.get("shadow_dropped", 0),
+        "agreement": totals.get("shadow_agree", 0) / scored if scored else None,
+        "changes": {
+            k[len("shadow_change:"):]: n for k, n in sorted(totals.items()) if k.startswith("shadow_change:")
+        },
+    }
+    return report
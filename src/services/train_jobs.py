@@ -0,0 +1,243 @@
+import fcntl
+import functools
+import json
+import os
+import threading
+import time
+import uuid
+import multiprocessing
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from utils.paths import JOBS_DIR, check_branch
+from utils.log import get_logger
+from utils.metrics import TRAIN_STAGE_SECONDS
+from utils.process import pid_alive
+
+logger = get_logger(__name__)
+
+# Jumlah training (cabang berbeda) yang boleh berjalan bersamaan per worker gunicorn
+TRAIN_CONCURRENCY = int(os.environ.get("TRAIN_CONCURRENCY", "2"))
+# Job yang tidak pernah mulai berjalan selama ini dianggap hilang (lock dilepas)
+TRAIN_QUEUED_TIMEOUT = float(os.environ.get("TRAIN_QUEUED_TIMEOUT", "3600"))
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _lock_path(branch=None):
+    """Satu lock per cabang: training satu cabang tidak menahan cabang lain"""
+    name = "train.lock" if branch is None else f"train-{branch}.lock"
+    return os.path.join(JOBS_DIR, name)
+
+
+def _get_executor():
+    # Proses training per worker gunicorn, dibuat saat /train pertama kali dipanggil.
+    # "spawn" supaya proses anak tidak mewarisi state thread/socket worker.
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(
+                max_workers=TRAIN_CONCURRENCY, mp_context=multiprocessing.get_context("spawn")
+            )
+        return _executor
+
+
+def _discard_executor(executor):
+    """
+    Executor rusak (proses anak mati, mis. OOM/SIGKILL) tidak bisa dipakai lagi:
+    dilepas supaya /train berikutnya membuat executor baru
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is executor:
+            _executor = None
+    executor.shutdown(wait=False)
+
+
+def _job_path(job_id):
+    return os.path.join(JOBS_DIR, f"{job_id}.json")
+
+
+def _write_job(job):
+    path = _job_path(job["id"])
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    with open(tmp_path, "w") as f:
+        json.dump(job, f)
+    os.replace(tmp_path, path)
+
+
+def get_job(job_id):
+    """Status job training, atau None kalau tidak ada"""
+    try:
+        with open(_job_path(job_id)) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def _is_active(job):
+    if job is None or job["status"] not in ("queued", "running"):
+        return False
+    if job["status"] == "queued":
+        # Belum ada proses training: worker pengirim harus masih hidup dan
+        # job belum terlalu lama mengantre (executor worker itu bisa rusak)
+        submitter = job.get("submitter_pid")
+        if submitter is not None and not pid_alive(submitter):
+            return False
+        return time.time() - job.get("created_at", 0) < TRAIN_QUEUED_TIMEOUT
+    # Proses training mati di tengah jalan → anggap job tidak aktif lagi
+    pid = job.get("pid")
+    return pid is None or pid_alive(pid)
+
+
+@contextmanager
+def _lock_mutex(lock_path):
+    """flock di samping file lock: cek-lalu-tulis lock tidak bisa balapan antar worker"""
+    with open(f"{lock_path}.mutex", "w") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _read_lock(lock_path):
+    try:
+        with open(lock_path) as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def _acquire_lock(job_id, lock_path):
+    """
+    Lock lintas worker (file berisi id job, diubah hanya di bawah flock).
+    Return None kalau berhasil, atau id job yang sedang aktif kalau training
+    sudah berjalan. Lock basi (job selesai/gagal/prosesnya mati) ditimpa.
+    """
+    with _lock_mutex(lock_path):
+        active_id = _read_lock(lock_path)
+        if active_id is not None and _is_active(get_job(active_id)):
+            return active_id
+        tmp_path = f"{lock_path}.tmp-{os.getpid()}"
+        with open(tmp_path, "w") as f:
+            f.write(job_id)
+        os.replace(tmp_path, lock_path)
+    return None
+
+
+def _release_lock(job_id, lock_path):
+    with _lock_mutex(lock_path):
+        if _read_lock(lock_path) != job_id:
+            return
+        try:
+            os.remove(lock_path)
+        except FileNotFoundError:
+            pass
+
+
+def _run_job(job):
+    """Dijalankan di proses training (bukan di worker gunicorn)"""
+    from services.train_service import train_model_service
+
+    job.update(status="running", pid=os.getpid(), started_at=time.time())
+    _write_job(job)
+    try:
+        result = train_model_service(**job["options"])
+        job.update(status="done", result=result)
+    except Exception as e:
+        logger.exception("Training job %s gagal", job["id"])
+        job.update(status="failed", error=str(e))
+    finally:
+        job["finished_at"] = time.time()
+        _write_job(job)
+        _release_lock(job["id"], _lock_path(job["options"].get("branch")))
+    return job
+
+
+def _fail_job(job, error):
+    """Tandai job gagal (kalau belum selesai) lalu lepas lock cabangnya"""
+    current = get_job(job["id"]) or job
+    if current["status"] in ("queued", "running"):
+        current.update(status="failed", error=error, finished_at=time.time())
+        _write_job(current)
+    _release_lock(job["id"], _lock_path(job["options"].get("branch")))
+
+
+def _on_job_done(job, executor, future):
+    """
+    Dipanggil di worker yang mengirim job. Durasi per tahap dicatat di sini
+    (training berjalan di proses lain). Proses training yang mati tidak sempat
+    menulis status: job ditandai gagal di sini dan lock cabangnya dilepas.
+    """
+    try:
+        done = future.result()
+    except BaseException as e:
+        logger.exception("Proses training job %s berhenti tidak normal", job["id"])
+        _fail_job(job, f"Proses training berhenti tidak normal: {e!r}")
+        if isinstance(e, BrokenProcessPool):
+            _discard_executor(executor)
+        return
+    for stage, seconds in done.get("result", {}).get("stage_seconds", {}).items():
+        TRAIN_STAGE_SECONDS.observe(seconds, stage)
+
+
+def submit_train_job(**options):
+    """
+    Jalankan training di background. options diteruskan ke train_model_service
+    (mis. search=True untuk mode pemilihan model, branch="..." untuk model cabang).
+    Kalau training cabang yang sama sedang berjalan (dari worker mana pun), job
+    yang aktif dikembalikan dan tidak ada training baru yang dibuat.
+    ValueError (sebelum job dibuat) kalau nama cabang tidak valid, belum ada data,
+    atau candidate diminta untuk cabang.
+    Return (job, created).
+    """
+    branch = check_branch(options.get("branch"))
+    if options.get("candidate") and branch is not None:
+        # Shadow scoring hanya membandingkan dengan model default
+        raise ValueError("candidate hanya untuk model default, tidak bisa dengan branch")
+    # pandas ikut dimuat di sini (sama seperti /records), bukan saat import app
+    from utils.record_store import dataset_path, has_training_data
+
+    if not has_training_data(options.get("data_path") or dataset_path(branch), branch):
+        raise ValueError(
+            "Belum ada data training" if branch is None
+            else f"Belum ada data training untuk cabang {branch} (dataset atau /records)"
+        )
+
+    lock_path = _lock_path(branch)
+    os.makedirs(JOBS_DIR, exist_ok=True)
+
+    # File job ditulis sebelum lock diambil, supaya worker lain yang melihat
+    # lock selalu bisa membaca status job-nya
+    job = {
+        "id": uuid.uuid4().hex,
+        "status": "queued",
+        "created_at": time.time(),
+        # Worker yang memegang executor; kalau mati sebelum job mulai, lock dianggap basi
+        "submitter_pid": os.getpid(),
+        "options": options,
+    }
+    job_id = job["id"]
+    _write_job(job)
+
+    active_id = _acquire_lock(job_id, lock_path)
+    if active_id is not None:
+        os.remove(_job_path(job_id))
+        return get_job(active_id), False
+
+    try:
+        executor = _get_executor()
+        try:
+            future = executor.submit(_run_job, job)
+        except BrokenProcessPool:
+            # Rusak sebelum callback job sebelumnya sempat melepasnya
+            _discard_executor(executor)
+            executor = _get_executor()
+            future = executor.submit(_run_job, job)
+        future.add_done_callback(functools.partial(_on_job_done, job, executor))
+    except Exception:
+        _release_lock(job_id, lock_path)
+        raise
+    return job, True
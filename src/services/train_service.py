@@ -1,83 +1,247 @@
 import os
+import sys
+import uuid
+from datetime import datetime, timezone
 import joblib
-import pandas as pd
-from sklearn.preprocessing import LabelEncoder
-from sklearn.tree import DecisionTreeClassifier, plot_tree
+import sklearn
+from sklearn.tree import DecisionTreeClassifier
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import confusion_matrix, classification_report
 from utils.normalize import normalize_damage
 from utils.mapping_type_unit import get_entry_category
-from utils.paths import DATA_PATH, MODEL_PATH, ENCODER_PATH
-import matplotlib.pyplot as plt
-from utils.preprocessing import preprocess_training
-
-def train_model_service():
-    df = pd.read_excel(DATA_PATH)
-    df.dropna(inplace=True)
-
-
-
-    # Hapus kolom tidak digunakan
-    if 'TANGGAL' in df.columns:
-        df["TANGGAL"] = pd.to_datetime(df["TANGGAL"], errors="coerce", dayfirst=True)
-        df = df.drop(columns=["TANGGAL"])
-
-
-    # Normalisasi kerusakan (gunakan file utils)
-    # df["KERUSAKAN"] = df["KERUSAKAN"].apply(normalize_damage)
-
-    # Mapping tipe unit → Entry / Mid / High
-    # df["TIPE UNIT"] = df.apply(
-    #     lambda x: get_entry_category(x["MEREK"], x["TIPE UNIT"]), axis=1
-    # )
-    df = preprocess_training(df)
-
-    # Tambahkan kategori biaya
-    bins = [0, 250000, 500000, float("inf")]
-    labels = ["Murah", "Sedang", "Mahal"]
-    df["KATEGORI_BIAYA"] = pd.cut(df["BIAYA"], bins=bins, labels=labels)
-
-    encoders = {}
-    for col in ["MEREK", "TIPE UNIT", "KERUSAKAN", "KATEGORI_BIAYA"]:
-        le = LabelEncoder()
-        df[col] = le.fit_transform(df[col])
-        encoders[col] = le
-
-    X = df[["MEREK", "TIPE UNIT", "KERUSAKAN"]]
-    y = df["KATEGORI_BIAYA"]
-
-    X_train, X_test, y_train, y_test = train_test_split(
-        X, y, test_size=0.3, random_state=42
-    )
-
-    model = DecisionTreeClassifier(criterion="entropy", random_state=42)
-    model.fit(X_train, y_train)
-
-    y_pred = model.predict(X_test)
-    acc = (y_pred == y_test).mean()
-    cm = confusion_matrix(y_test, y_pred)
-    report = classification_report(
-        y_test, y_pred, target_names=encoders["KATEGORI_BIAYA"].classes_, output_dict=True
-    )
-
-    os.makedirs("model", exist_ok=True)
-    joblib.dump(model, MODEL_PATH)
-    joblib.dump(encoders, ENCODER_PATH)
-
-    # Visualisasi Tree
-    plt.figure(figsize=(30, 20))
-    plot_tree(
-        model,
-        feature_names=["MEREK", "TIPE UNIT", "KERUSAKAN"],
-        class_names=encoders["KATEGORI_BIAYA"].classes_,
-        filled=True,
+from utils.paths import MODEL_PATH, ENCODER_PATH, BUNDLE_PATH, CANDIDATE_BUNDLE_PATH, for_branch
+from utils.record_store import training_data_info, dataset_path
+from utils.dataset_cache import content_hash, source_hash
+from services.model_registry import get_registry, BUNDLE_VERSION_ATTR
+from services import compiled_model, cost_model, model_selection, training_data
+from services.training_data import FEATURES, TARGET, BIAYA_BINS, BIAYA_LABELS, load_encoded
+from services.tree_service import render_tree_png
+from services.compiled_model import compile_model_arrays, verify_lookup_table
+from services.artifact import write_bundle
+from services.model_selection import SEARCH_SPACE, search_model
+from services.cost_model import (
+    QUANTILES, MIN_SAMPLES_LEAF, fit_cost_model, compile_cost_table, compile_cost_fallback_tables,
+    evaluate_cost_table,
+)
+from utils.metrics import StageTimer, TRAIN_STAGE_SECONDS
+
+# Pembagian data train/test
+TEST_SIZE = 0.3
+SPLIT_RANDOM_STATE = 42
+
+
+def _base_model():
+    """Model default (tanpa search)"""
+    return DecisionTreeClassifier(criterion="entropy", random_state=42)
+
+def _json_params(model):
+    """Parameter estimator yang bisa disimpan di JSON"""
+    return {
+        k: v for k, v in model.get_params().items()
+        if isinstance(v, (str, int, float, bool, type(None)))
+    }
+
+def training_fingerprint(search=False, regression=False):
+    """
+    Hash semua yang menentukan hasil training selain data: parameter estimator,
+    ruang search, bin biaya, fitur, pembagian train/test, parameter regresi,
+    versi sklearn, dan source modul training. Logika training berubah -> hash
+    berubah -> retrain tidak dilewati.
+    """
+    return content_hash({
+        "model": _json_params(_base_model()),
+        "search": [
+            {"name": name, "params": _json_params(base), "grid": grid}
+            for name, base, grid in SEARCH_SPACE
+        ] if search else None,
+        "regression": {
+            "quantiles": list(QUANTILES), "min_samples_leaf": MIN_SAMPLES_LEAF,
+        } if regression else None,
+        "features": FEATURES,
+        "target": TARGET,
+        "bins": BIAYA_BINS,
+        "labels": BIAYA_LABELS,
+        "split": {"test_size": TEST_SIZE, "random_state": SPLIT_RANDOM_STATE},
+        "sklearn": sklearn.__version__,
+        "code": source_hash(sys.modules[__name__], training_data, model_selection, cost_model, compiled_model),
+    })
+
+
+def _dump_atomic(obj, path):
+    """Tulis ke file sementara lalu rename, supaya worker lain tidak membaca file setengah jadi"""
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    joblib.dump(obj, tmp_path)
+    os.replace(tmp_path, path)
+
+def _unchanged_result(snapshot, info, options, branch, timer):
+    """
+    Hasil training sebelumnya kalau model aktif dilatih dari data, opsi, dan
+    kode training yang sama (training deterministik, random_state tetap) ->
+    training dilewati. Bentuk result sama dengan training biasa (evaluasi
+    dibaca dari manifest), ditambah "skipped": True.
+    """
+    manifest = snapshot.manifest if snapshot is not None else {}
+    if manifest.get("training_data", {}).get("hash") != info["hash"]:
+        return None
+    if manifest.get("training_options") != options:
+        return None
+    # Manifest lama (sebelum evaluasi disimpan) -> latih ulang
+    if "evaluation" not in manifest:
+        return None
+
+    metrics = manifest.get("metrics", {})
+    evaluation = manifest["evaluation"]
+    result = {
+        "accuracy": metrics.get("accuracy"),
+        "confusion_matrix": evaluation["confusion_matrix"],
+        "classification_report": evaluation["classification_report"],
+        "total_data": metrics.get("total_data"),
+        "compiled_combinations": metrics.get("compiled_combinations"),
+        "model_version": manifest.get("version"),
+        "candidate": False,
+        "branch": branch,
+        "skipped": True,
+        "training_data": {"hash": info["hash"], "cached": True},
+        "stage_seconds": timer.seconds,
+    }
+    if "model_selection" in evaluation:
+        result["model_selection"] = evaluation["model_selection"]
+    if "cost_model" in manifest:
+        result["cost_model"] = manifest["cost_model"]
+    return result
+
+def train_model_service(render_tree=False, data_path=None, search=False, regression=False,
+                        candidate=False, branch=None, force=False):
+    """
+    branch: latih model cabang dari data/branches/<cabang>/ (dataset + record)
+    ke model/branches/<cabang>/; None = model default.
+    Kalau data training (hash isi + tabel mapping + parameter), opsi, dan kode
+    training (training_fingerprint) sama dengan model aktif, training dilewati (result["skipped"]); force=True untuk tetap melatih.
+    """
+    timer = StageTimer(TRAIN_STAGE_SECONDS)
+    if data_path is None:
+        data_path = dataset_path(branch)
+    options = {
+        "search": bool(search),
+        "regression": bool(regression),
+        "fingerprint": training_fingerprint(search, regression),
+    }
+
+    with timer.stage("hash_data"):
+        info = training_data_info(data_path, branch=branch)
+
+    if not force and not candidate and not render_tree:
+        unchanged = _unchanged_result(get_registry(branch).get(), info, options, branch, timer)
+        if unchanged is not None:
+            return unchanged
+
+    # Dataset utama + record tambahan, sudah dipreprocessing dan di-encode
+    # (lihat services/training_data; dibaca dari cache kalau hash-nya sama)
+    with timer.stage("load_data"):
+        data, info, cached = load_encoded(data_path, branch=branch, info=info)
+        encoders = data.encoders
+
+    X_train, X_test, y_train, y_test, biaya_train, biaya_test = train_test_split(
+        data.X, data.y, data.biaya, test_size=TEST_SIZE, random_state=SPLIT_RANDOM_STATE
     )
-    plt.savefig("model/tree.png")
-    plt.close()
 
-    return {
+    # Mode pemilihan model (opsional): CV paralel di data train saja
+    selection = None
+    if search:
+        with timer.stage("search"):
+            model, selection = search_model(X_train, y_train)
+    else:
+        model = _base_model()
+
+    with timer.stage("fit"):
+        model.fit(X_train, y_train)
+
+    with timer.stage("evaluate"):
+        y_pred = model.predict(X_test)
+        acc = (y_pred == y_test).mean()
+        cm = confusion_matrix(y_test, y_pred)
+        report = classification_report(
+            y_test, y_pred, target_names=encoders["KATEGORI_BIAYA"].classes_, output_dict=True
+        )
+
+    # Compile tree jadi tabel lookup dan pastikan sama dengan model.predict
+    with timer.stage("compile"):
+        arrays = compile_model_arrays(model, encoders)
+        compiled = verify_lookup_table(arrays["lookup"], model)
+
+    # Mode regresi (opsional): estimasi biaya dalam Rupiah + rentang kuantil
+    cost_info = None
+    if regression:
+        with timer.stage("regression"):
+            cost_regressor, node_quantiles = fit_cost_model(X_train, biaya_train)
+            cost_table = compile_cost_table(cost_regressor, node_quantiles, arrays["lookup"].shape)
+            cost_fallback = compile_cost_fallback_tables(cost_table)
+            arrays.update(
+                cost_quantiles=cost_table,
+                cost_fallback_brand=cost_fallback["brand"],
+                cost_fallback_tier=cost_fallback["tier"],
+                cost_fallback_brand_tier=cost_fallback["brand+tier"],
+            )
+            cost_info = {"quantiles": list(QUANTILES), **evaluate_cost_table(cost_table, X_test, biaya_test)}
+
+    with timer.stage("save"):
+        os.makedirs(os.path.dirname(for_branch(BUNDLE_PATH, branch)), exist_ok=True)
+        manifest = {
+            "version": uuid.uuid4().hex,
+            "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "model_type": type(model).__name__,
+            "params": _json_params(model),
+            "features": FEATURES,
+            "classes": {col: [str(c) for c in le.classes_] for col, le in encoders.items()},
+            "metrics": {"accuracy": float(acc), "total_data": len(data.X), "compiled_combinations": compiled},
+            "branch": branch,
+            "dataset_hash": info["dataset_hash"],
+            # Identitas data training (dataset + record + tabel mapping + parameter)
+            "training_data": info,
+            "training_options": options,
+            "distribution": data.distribution,
+            # Disimpan supaya hasil retrain yang dilewati sama bentuknya
+            "evaluation": {"confusion_matrix": cm.tolist(), "classification_report": report},
+        }
+        if selection is not None:
+            manifest["evaluation"]["model_selection"] = selection
+        if cost_info is not None:
+            manifest["cost_model"] = cost_info
+
+        if candidate:
+            # Model kandidat: hanya bundle untuk shadow scoring, model aktif tidak berubah
+            write_bundle(for_branch(CANDIDATE_BUNDLE_PATH, branch), manifest, arrays)
+        else:
+            # Pickle tetap ditulis (gambar/teks tree dan fallback kalau bundle tidak ada)
+            _dump_atomic(encoders, for_branch(ENCODER_PATH, branch))
+            # Versi bundle ikut disimpan di pickle: snapshot bundle mengecek pasangannya
+            setattr(model, BUNDLE_VERSION_ATTR, manifest["version"])
+            _dump_atomic(model, for_branch(MODEL_PATH, branch))
+            # Bundle ditulis terakhir: begitu muncul, pickle di atas sudah versi yang sama
+            write_bundle(for_branch(BUNDLE_PATH, branch), manifest, arrays)
+            get_registry(branch).reload()
+
+    # Visualisasi Tree (opsional; default dirender saat GET /model/tree.png)
+    if render_tree and not candidate and hasattr(model, "tree_"):
+        with timer.stage("render_tree"):
+            with open(os.path.join(os.path.dirname(for_branch(MODEL_PATH, branch)), "tree.png"), "wb") as f:
+                f.write(render_tree_png(model, encoders["KATEGORI_BIAYA"].classes_))
+
+    result = {
         "accuracy": float(acc),
         "confusion_matrix": cm.tolist(),
         "classification_report": report,
-        "total_data": len(df),
-    }
\ No newline at end of file
+        "total_data": len(data.X),
+        "compiled_combinations": compiled,
+        "model_version": manifest["version"],
+        "candidate": candidate,
+        "branch": branch,
+        "skipped": False,
+        "training_data": {"hash": info["hash"], "cached": cached},
+        "stage_seconds": timer.seconds,
+    }
+    if selection is not None:
+        result["model_selection"] = selection
+    if cost_info is not None:
+        result["cost_model"] = cost_info
+    return result
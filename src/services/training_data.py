@@ -0,0 +1,166 @@
+"""
+Data training yang sudah dipreprocessing + di-encode, disimpan per hash isinya.
+
+Key = record_store.training_data_info()["hash"]: dataset mentah, record
+tambahan, tabel mapping, dan parameter preprocessing. Retrain tanpa perubahan
+data langsung membaca matriks ini dan lanjut ke fit.
+"""
+import glob
+import json
+import os
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import LabelEncoder
+from utils.dataset_cache import save_arrays
+from utils.log import get_logger
+from utils.paths import DATASET_CACHE_DIR, for_branch
+from utils.preprocessing import MIN_KERUSAKAN_COUNT
+from utils.record_store import load_training_codes, training_data_info
+
+logger = get_logger(__name__)
+
+FEATURES = ["MEREK", "TIPE UNIT", "KERUSAKAN"]
+TARGET = "KATEGORI_BIAYA"
+
+# Kategori biaya dari BIAYA (Rupiah)
+BIAYA_BINS = [0, 250000, 500000, float("inf")]
+BIAYA_LABELS = ["Murah", "Sedang", "Mahal"]
+
+
+class EncodedData:
+    """Fitur + target ter-encode (siap fit), BIAYA asli, encoder, dan sebaran data"""
+
+    def __init__(self, X, y, biaya, encoders, distribution):
+        self.X = X
+        self.y = y
+        self.biaya = biaya
+        self.encoders = encoders
+        self.distribution = distribution
+
+    def to_arrays(self):
+        arrays = {
+            "X": self.X.to_numpy(),
+            "y": self.y.to_numpy(),
+            "BIAYA": self.biaya.to_numpy(),
+            "distribution": np.asarray(json.dumps(self.distribution)),
+        }
+        for col, le in self.encoders.items():
+            arrays[f"{col}__classes"] = np.asarray(le.classes_, dtype=str)
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, npz):
+        encoders = {}
+        for col in FEATURES + [TARGET]:
+            le = LabelEncoder()
+            le.classes_ = npz[f"{col}__classes"].astype(object)
+            encoders[col] = le
+        return cls(
+            X=pd.DataFrame(npz["X"], columns=FEATURES),
+            y=pd.Series(npz["y"], name=TARGET),
+            biaya=pd.Series(npz["BIAYA"], name="BIAYA"),
+            encoders=encoders,
+            distribution=json.loads(str(npz["distribution"])),
+        )
+
+
+def _sorted_codes(codes, uniques):
+    """
+    Kode baru = urutan nilai di classes_ LabelEncoder (nilai yang ada saja, terurut).
+    Hanya nilai unik yang diurutkan; baris cukup di-remap lewat array int.
+    Return (kode baru per baris, classes, jumlah per class).
+    """
+    present = np.bincount(codes, minlength=len(uniques))
+    used = np.flatnonzero(present)
+    order = used[np.argsort(uniques[used], kind="stable")]
+    remap = np.full(len(uniques), -1, dtype=np.int64)
+    remap[order] = np.arange(len(order))
+    return remap[codes], uniques[order].astype(object), present[order]
+
+
+def _distribution(classes, counts):
+    """Fraksi per nilai, urut dari yang terbanyak (sama dengan value_counts(normalize=True))"""
+    total = counts.sum()
+    order = np.argsort(-counts, kind="stable")
+    return {str(classes[i]): float(counts[i] / total) if total else 0.0 for i in order}
+
+
+def encode_codes(acc, min_count=MIN_KERUSAKAN_COUNT):
+    """
+    CodeAccumulator hasil preprocessing -> EncodedData, langsung dari kode int
+    (tanpa kolom string per baris dan tanpa LabelEncoder.fit_transform).
+    Hasil sama dengan filter_kerusakan_minimum + LabelEncoder pada DataFrame-nya.
+    """
+    # Kategori biaya (kode urut BIAYA_LABELS; -1 = di luar BIAYA_BINS). Baris di
+    # luar bin dibuang seperti baris invalid di clean_text, training tetap jalan
+    kategori = pd.cut(acc.column("BIAYA"), bins=BIAYA_BINS, labels=BIAYA_LABELS).codes
+    in_bins = kategori >= 0
+    if not in_bins.all():
+        logger.warning("%d baris dengan BIAYA di luar %s dilewati", int((~in_bins).sum()), BIAYA_BINS)
+    # Kerusakan yang jumlahnya terlalu sedikit dibuang (jumlah dari accumulator)
+    keep = (acc.counts["KERUSAKAN"] >= min_count)[acc.column("KERUSAKAN")] & in_bins
+
+    X = np.empty((int(keep.sum()), len(FEATURES)), dtype=np.int64)
+    encoders = {}
+    distribution = {}
+    for j, col in enumerate(FEATURES):
+        X[:, j], classes, counts = _sorted_codes(acc.column(col)[keep], acc.uniques(col))
+        le = LabelEncoder()
+        le.classes_ = classes
+        encoders[col] = le
+        if col == "TIPE UNIT":
+            # Sebaran data training, pembanding statistik trafik live (GET /stats)
+            distribution[col] = _distribution(classes, counts)
+
+    biaya = acc.column("BIAYA")[keep]
+    kategori = kategori[keep]
+    distribution[TARGET] = _distribution(
+        np.asarray(BIAYA_LABELS, dtype=object), np.bincount(kategori, minlength=len(BIAYA_LABELS))
+    )
+    y, classes, _ = _sorted_codes(kategori.astype(np.int64), np.asarray(BIAYA_LABELS, dtype=str))
+    le = LabelEncoder()
+    le.classes_ = classes
+    encoders[TARGET] = le
+
+    return EncodedData(
+        # copy=False: pandas 3 menyalin ndarray secara default
+        X=pd.DataFrame(X, columns=FEATURES, copy=False),
+        y=pd.Series(y, name=TARGET),
+        biaya=pd.Series(biaya, name="BIAYA"),
+        encoders=encoders,
+        distribution=distribution,
+    )
+
+
+def _cache_path(digest, branch=None):
+    return os.path.join(for_branch(DATASET_CACHE_DIR, branch), f"training-{digest[:16]}.npz")
+
+
+def load_encoded(path, min_count=MIN_KERUSAKAN_COUNT, branch=None, info=None):
+    """
+    Data training ter-encode untuk dataset `path` (+ record tambahan cabang).
+    info: hasil training_data_info kalau sudah dihitung pemanggil.
+    Return (EncodedData, info, cached).
+    """
+    if info is None:
+        info = training_data_info(path, min_count, branch)
+
+    cache_path = _cache_path(info["hash"], branch)
+    if os.path.exists(cache_path):
+        with np.load(cache_path) as npz:
+            return EncodedData.from_arrays(npz), info, True
+
+    acc, info = load_training_codes(path, min_count, branch)
+    data = encode_codes(acc, min_count)
+
+    cache_path = _cache_path(info["hash"], branch)
+    save_arrays(data.to_arrays(), cache_path)
+    # Hanya versi data terbaru yang disimpan
+    for old_path in glob.glob(_cache_path("*", branch)):
+        if old_path != cache_path:
+            try:
+                os.remove(old_path)
+            except FileNotFoundError:
+                # Sudah dihapus proses lain
+                pass
+    return data, info, False
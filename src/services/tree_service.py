@@ -0,0 +1,135 @@
+import io
+import os
+import threading
+from collections import OrderedDict
+
+FEATURE_NAMES = ["MEREK", "TIPE UNIT", "KERUSAKAN"]
+
+# Cache gambar per versi model: LRU kecil (model default + beberapa cabang)
+TREE_PNG_CACHE_SIZE = int(os.environ.get("TREE_PNG_CACHE_SIZE", "4"))
+_png_cache = OrderedDict()
+# Lock per versi yang sedang dirender (versi sama tidak dirender dua kali)
+_png_rendering = {}
+_png_lock = threading.Lock()
+
+
+def render_tree_png(model, class_names):
+    """
+    Gambar decision tree sebagai PNG (matplotlib baru di-import di sini).
+    Figure dibuat tanpa pyplot (tanpa state global), jadi aman dirender
+    bersamaan dari beberapa thread.
+    """
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+    from sklearn.tree import plot_tree
+
+    fig = Figure(figsize=(30, 20))
+    FigureCanvasAgg(fig)
+    plot_tree(
+        model,
+        feature_names=FEATURE_NAMES,
+        class_names=list(class_names),
+        filled=True,
+        ax=fig.add_subplot(),
+    )
+    buf = io.BytesIO()
+    fig.savefig(buf, format="png")
+    return buf.getvalue()
+
+
+def has_tree(snapshot):
+    """Visualisasi hanya untuk decision tree tunggal (bukan ensemble)"""
+    return snapshot.tree is not None
+
+
+def _cached_png(key):
+    with _png_lock:
+        png = _png_cache.get(key)
+        if png is not None:
+            _png_cache.move_to_end(key)
+        return png
+
+
+def tree_png(snapshot):
+    """
+    PNG tree untuk snapshot model; dirender sekali per versi. Render berjalan
+    di luar lock global: request untuk versi lain (mis. cabang lain) tidak ikut menunggu.
+    """
+    # Versi di manifest unik per training (versi file bisa sama antar cabang)
+    key = snapshot.manifest.get("version") or snapshot.version
+    png = _cached_png(key)
+    if png is not None:
+        return png
+
+    with _png_lock:
+        render_lock = _png_rendering.setdefault(key, threading.Lock())
+    with render_lock:
+        # Thread lain mungkin sudah selesai merender versi ini
+        png = _cached_png(key)
+        if png is not None:
+            return png
+        try:
+            png = render_tree_png(snapshot.model, snapshot.classes["KATEGORI_BIAYA"])
+        finally:
+            # Simpan + lepas lock render sekaligus (render gagal: hanya dilepas)
+            with _png_lock:
+                if png is not None:
+                    _png_cache[key] = png
+                    while len(_png_cache) > TREE_PNG_CACHE_SIZE:
+                        _png_cache.popitem(last=False)
+                _png_rendering.pop(key, None)
+    return png
+
+
+def tree_text(snapshot):
+    """Representasi teks tree (sklearn export_text)"""
+    from sklearn.tree import export_text
+
+    return export_text(
+        snapshot.model,
+        feature_names=FEATURE_NAMES,
+        class_names=list(snapshot.classes["KATEGORI_BIAYA"]),
+        max_depth=snapshot.model.get_depth(),
+    )
+
+
+def tree_json(snapshot):
+    """Node tree sebagai list dict (langsung dari array node, tanpa sklearn)"""
+    tree = snapshot.tree
+    class_names = list(snapshot.classes["KATEGORI_BIAYA"])
+    left, right = tree["children_left"], tree["children_right"]
+
+    nodes = []
+    for i in range(len(left)):
+        node = {
+            "id": i,
+            "samples": int(tree["n_node_samples"][i]),
+            "class": class_names[int(tree["value"][i].argmax())],
+        }
+        if left[i] != right[i]:
+            node.update(
+                feature=FEATURE_NAMES[tree["feature"][i]],
+                threshold=float(tree["threshold"][i]),
+                left=int(left[i]),
+                right=int(right[i]),
+            )
+        nodes.append(node)
+
+    return {
+        "features": FEATURE_NAMES,
+        "classes": class_names,
+        "depth": _depth(left, right),
+        "nodes": nodes,
+    }
+
+
+def _depth(left, right):
+    depth = 0
+    stack = [(0, 0)]
+    while stack:
+        node, d = stack.pop()
+        depth = max(depth, d)
+        if left[node] != right[node]:
+            stack.append((left[node], d + 1))
+            stack.append((right[node], d + 1))
+    return depth
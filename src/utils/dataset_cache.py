@@ -0,0 +1,46 @@
+import hashlib
+import json
+import os
+import threading
+import numpy as np
+
+# Kolom yang dipakai pipeline training
+TEXT_COLUMNS = ["MEREK", "TIPE UNIT", "KERUSAKAN"]
+NUMERIC_COLUMNS = ["BIAYA"]
+DATASET_COLUMNS = TEXT_COLUMNS + NUMERIC_COLUMNS
+
+
+def file_hash(path):
+    """sha256 isi file (dibaca per blok)"""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def content_hash(obj):
+    """
+    sha256 objek JSON (dict/list/str/angka). Urutan key ikut dihitung:
+    urutan tabel mapping bisa mengubah hasil pencocokan.
+    """
+    data = json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
+def source_hash(*modules):
+    """
+    sha256 source modul Python: logika yang berubah otomatis mengubah key cache,
+    tanpa bergantung pada konstanta versi yang harus dinaikkan manual.
+    """
+    return content_hash({m.__name__: file_hash(m.__file__) for m in modules})
+
+
+def save_arrays(arrays, cache_path):
+    """Tulis dict array ke .npz (atomic)"""
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    # Nama sementara tidak berakhiran .npz, supaya tidak ikut terhapus glob cleanup cache lama
+    tmp_path = f"{cache_path}.tmp-{os.getpid()}-{threading.get_ident()}"
+    with open(tmp_path, "wb") as f:
+        np.savez(f, **arrays)
+    os.replace(tmp_path, cache_path)
@@ -0,0 +1,138 @@
+import re
+from collections import defaultdict
+
+NGRAM = 3
+_DIGITS = re.compile(r"\d+")
+
+
+def _ngrams(text):
+    """n-gram karakter dengan padding, supaya awal/akhir kata ikut dihitung"""
+    padded = f"  {text} "
+    return {padded[i:i + NGRAM] for i in range(len(padded) - NGRAM + 1)}
+
+
+def levenshtein(a, b, max_distance):
+    """
+    Jarak edit a-b, atau max_distance + 1 kalau sudah pasti lebih besar.
+    Hanya sel dalam pita |i - j| <= max_distance yang dihitung.
+    """
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    over = max_distance + 1
+    previous = [j if j <= max_distance else over for j in range(len(b) + 1)]
+    for i, ca in enumerate(a, 1):
+        lo = max(1, i - max_distance)
+        hi = min(len(b), i + max_distance)
+        current = [over] * (len(b) + 1)
+        current[0] = i if i <= max_distance else over
+        row_min = current[0]
+        for j in range(lo, hi + 1):
+            # min(hapus, sisip, ganti) tanpa memanggil min() (loop paling panas)
+            d = previous[j - 1] if ca == b[j - 1] else previous[j - 1] + 1
+            if previous[j] + 1 < d:
+                d = previous[j] + 1
+            if current[j - 1] + 1 < d:
+                d = current[j - 1] + 1
+            current[j] = d
+            if d < row_min:
+                row_min = d
+        if row_min > max_distance:
+            return over
+        previous = current
+    return min(previous[-1], over)
+
+
+def digit_runs(text):
+    """Semua deret angka di teks, mis. "NOTE 14 PRO 5G" -> ("14", "5")"""
+    return tuple(_DIGITS.findall(text))
+
+
+def tokens_close(text, key):
+    """
+    Salah ketik per kata: jumlah kata sama dan setiap kata paling jauh
+    max_typos(kata) edit. Kata pendek (< 4 huruf) harus sama persis, jadi
+    "ganti ic" bukan salah ketik "ganti lcd". Beda jumlah kata hanya boleh
+    kalau yang berbeda cuma spasi ("gantitombol").
+    """
+    words, key_words = text.split(), key.split()
+    if len(words) != len(key_words):
+        return "".join(words) == "".join(key_words)
+    return all(levenshtein(w, k, max_typos(w)) <= max_typos(w) for w, k in zip(words, key_words))
+
+
+def max_typos(text):
+    """Batas jarak edit yang masih dianggap salah ketik, sesuai panjang teks"""
+    if len(text) < 4:
+        return 0
+    if len(text) < 8:
+        return 1
+    return 2 if len(text) < 16 else 3
+
+
+class FuzzyIndex:
+    """
+    Index n-gram karakter untuk mencari key terdekat (jarak Levenshtein).
+
+    Satu edit paling banyak merusak NGRAM n-gram, jadi key dengan jarak <= k
+    pasti berbagi minimal max(|n-gram teks|, |n-gram key|) - NGRAM * k n-gram
+    dengan teks. Hanya kandidat yang lolos filter itu yang dihitung jaraknya.
+
+    exact_digits=True: deret angka harus sama persis, salah ketik hanya di huruf.
+    Untuk nomor model ("S24" bukan salah ketik "S20", tapi model yang lebih baru).
+    per_token=True: batas salah ketik berlaku per kata (lihat tokens_close), jadi
+    satu kata pendek tidak bisa diganti seluruhnya (nama kerusakan).
+    """
+
+    def __init__(self, keys, exact_digits=False, per_token=False):
+        self.keys = list(dict.fromkeys(keys))
+        self.exact_digits = exact_digits
+        self.per_token = per_token
+        self._digits = [digit_runs(k) for k in self.keys] if exact_digits else None
+        self._grams = [_ngrams(k) for k in self.keys]
+        self._postings = defaultdict(list)
+        for i, grams in enumerate(self._grams):
+            for g in grams:
+                self._postings[g].append(i)
+
+    def best(self, text, max_distance=None):
+        """
+        Key terdekat sebagai (key, jarak), atau None kalau tidak ada yang cukup dekat.
+        Jarak sama -> key yang lebih dulu di daftar.
+        """
+        if max_distance is None:
+            max_distance = max_typos(text)
+        if max_distance <= 0:
+            return None
+
+        digits = digit_runs(text) if self.exact_digits else None
+        grams = _ngrams(text)
+        shared = defaultdict(int)
+        for g in grams:
+            for i in self._postings.get(g, ()):
+                shared[i] += 1
+
+        # Batas bawah jarak dari jumlah n-gram bersama; kandidat dengan batas
+        # bawah terkecil dicek dulu supaya batas jarak cepat mengecil
+        candidates = []
+        for i, n in shared.items():
+            if digits is not None and self._digits[i] != digits:
+                continue
+            missing = max(len(grams), len(self._grams[i])) - n
+            lower = -(-missing // NGRAM)
+            if lower <= max_distance:
+                candidates.append((lower, i))
+        candidates.sort()
+
+        best = None
+        for lower, i in candidates:
+            # Jarak sama hanya menang kalau key-nya lebih dulu di daftar
+            if best is None:
+                limit = max_distance
+            else:
+                limit = best[1] if i < best[2] else best[1] - 1
+            if lower > limit:
+                continue
+            d = levenshtein(text, self.keys[i], limit)
+            if d <= limit and (not self.per_token or tokens_close(text, self.keys[i])):
+                best = (self.keys[i], d, i)
+        return None if best is None else best[:2]
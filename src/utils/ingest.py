@@ -0,0 +1,149 @@
+"""
+Ingest dataset besar per potongan (chunk).
+
+Setiap chunk dibersihkan, dinormalisasi, lalu disimpan hanya sebagai kode
+integer per kolom teks (+ BIAYA); nilai teks unik disimpan sekali saja.
+Memori puncak = satu chunk mentah + array kode, tidak tergantung ukuran file.
+"""
+import itertools
+import os
+import numpy as np
+import pandas as pd
+from utils.dataset_cache import TEXT_COLUMNS, NUMERIC_COLUMNS, DATASET_COLUMNS
+
+CHUNK_ROWS = 50_000
+
+
+def _iter_excel(path, chunksize, columns):
+    """Baris Excel dibaca streaming (openpyxl read-only), tidak seluruh workbook"""
+    from openpyxl import load_workbook
+
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = wb.worksheets[0].iter_rows(values_only=True)
+        header = [str(h).strip() if h is not None else None for h in next(rows, ())]
+        if columns is None:
+            columns = [h for h in header if h is not None]
+        missing = [col for col in columns if col not in header]
+        if missing:
+            raise ValueError(f"Kolom tidak ditemukan di {path}: {missing}")
+        index = [header.index(col) for col in columns]
+
+        while True:
+            block = list(itertools.islice(rows, chunksize))
+            if not block:
+                break
+            yield pd.DataFrame(
+                [[row[i] if i < len(row) else None for i in index] for row in block],
+                columns=columns,
+            )
+    finally:
+        wb.close()
+
+
+def iter_chunks(path, chunksize=CHUNK_ROWS, columns=DATASET_COLUMNS):
+    """
+    DataFrame per chunk dari CSV, JSONL, atau Excel, berisi kolom `columns`
+    (None = semua kolom di file)
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".csv":
+        yield from pd.read_csv(path, usecols=columns, chunksize=chunksize)
+    elif ext in (".jsonl", ".ndjson"):
+        for chunk in pd.read_json(path, lines=True, dtype=False, chunksize=chunksize):
+            yield chunk if columns is None else chunk.reindex(columns=columns)
+    else:
+        yield from _iter_excel(path, chunksize, columns)
+
+
+class CodeAccumulator:
+    """
+    Kumpulkan kolom teks sebagai kode int32 (nilai unik dicatat sekali) + kolom numerik.
+    Jumlah baris per nilai unik ikut dihitung per chunk (counts[col][kode]),
+    jadi filter jumlah minimum tidak perlu membaca ulang data.
+    """
+
+    def __init__(self):
+        self.values = {col: {} for col in TEXT_COLUMNS}
+        self.codes = {col: [] for col in TEXT_COLUMNS}
+        self.counts = {col: np.zeros(0, dtype=np.int64) for col in TEXT_COLUMNS}
+        self.numeric = {col: [] for col in NUMERIC_COLUMNS}
+        self.rows = 0
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        """Lanjutkan dari hasil arrays() (mis. dataset utama yang sudah di-cache)"""
+        acc = cls()
+        for col in TEXT_COLUMNS:
+            acc.values[col] = {u: i for i, u in enumerate(arrays[f"{col}__uniques"].tolist())}
+            acc.codes[col] = [arrays[f"{col}__codes"]]
+            acc.counts[col] = arrays[f"{col}__counts"].astype(np.int64)
+        for col in NUMERIC_COLUMNS:
+            acc.numeric[col] = [arrays[col]]
+        acc.rows = len(arrays[f"{TEXT_COLUMNS[0]}__codes"])
+        return acc
+
+    def _grow_counts(self, col):
+        counts = self.counts[col]
+        missing = len(self.values[col]) - len(counts)
+        if missing > 0:
+            self.counts[col] = np.concatenate([counts, np.zeros(missing, dtype=np.int64)])
+        return self.counts[col]
+
+    def add(self, df, count=True):
+        """
+        Tambah satu chunk. count=False: jumlah per nilai tidak dihitung dari chunk
+        ini (ditambahkan terpisah lewat add_counts, mis. jumlah berjalan record store).
+        """
+        for col in TEXT_COLUMNS:
+            # NaN jadi nilai unik sendiri (kode -1 akan mengambil nilai unik terakhir)
+            chunk_codes, uniques = pd.factorize(df[col], use_na_sentinel=False)
+            lookup = self.values[col]
+            # Kode chunk -> kode global (nilai baru mendapat kode berikutnya)
+            remap = np.array([lookup.setdefault(u, len(lookup)) for u in uniques], dtype=np.int32)
+            self.codes[col].append(remap[chunk_codes])
+            if count:
+                self._grow_counts(col)[remap] += np.bincount(chunk_codes, minlength=len(uniques))
+        for col in NUMERIC_COLUMNS:
+            self.numeric[col].append(df[col].to_numpy())
+        self.rows += len(df)
+
+    def add_counts(self, counts):
+        """Tambah jumlah per nilai dari luar: {kolom: {nilai: jumlah}}"""
+        for col, value_counts in counts.items():
+            lookup = self.values[col]
+            codes = [lookup.setdefault(value, len(lookup)) for value in value_counts]
+            self._grow_counts(col)[codes] += np.fromiter(value_counts.values(), dtype=np.int64, count=len(codes))
+
+    def column(self, col):
+        """Kode (kolom teks) atau nilai (kolom numerik) semua baris"""
+        parts = self.codes[col] if col in self.codes else self.numeric[col]
+        if len(parts) != 1:
+            empty = np.empty(0, np.int32 if col in self.codes else np.float64)
+            parts[:] = [np.concatenate(parts or [empty])]
+        return parts[0]
+
+    def uniques(self, col):
+        return np.asarray(list(self.values[col]), dtype=str)
+
+    def arrays(self):
+        """Kode + nilai unik per kolom teks, jumlah per nilai (<kolom>__counts), kolom numerik"""
+        arrays = {}
+        for col in TEXT_COLUMNS:
+            arrays[f"{col}__codes"] = self.column(col)
+            arrays[f"{col}__uniques"] = self.uniques(col)
+            arrays[f"{col}__counts"] = self.counts[col]
+        for col in NUMERIC_COLUMNS:
+            arrays[col] = self.column(col)
+        return arrays
+
+
+def ingest_file(path, process, chunksize=CHUNK_ROWS):
+    """
+    Baca file per chunk, jalankan process(chunk) (mis. preprocess_records),
+    dan kumpulkan hasilnya sebagai kode. Return CodeAccumulator.
+    """
+    acc = CodeAccumulator()
+    for chunk in iter_chunks(path, chunksize):
+        acc.add(process(chunk))
+    return acc
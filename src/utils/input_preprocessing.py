@@ -0,0 +1,20 @@
+from utils.normalize import normalize_damage
+from utils.mapping_type_unit import get_entry_category
+from utils.waktu_mapping import waktu_mapping
+from utils.waktu_kategori import KATEGORI_WAKTU
+
+
+def preprocess_input(brand, tipe, damage):
+    """Preprocessing untuk 1 data input user pada saat prediksi"""
+
+    brand = brand.lower().strip()
+    tipe = tipe.lower().strip()
+    damage = damage.lower().strip()
+
+    damage = normalize_damage(damage)
+    tipe = get_entry_category(brand, tipe)
+    
+    waktu_estimasi = waktu_mapping.get(damage, "Tidak diketahui")
+    kategori = KATEGORI_WAKTU.get(damage, "Tidak Diketahui")
+    
+    return brand, tipe, damage, kategori, waktu_estimasi
@@ -0,0 +1,20 @@
+import logging
+import os
+import random
+
+# Fraksi log debug per request yang benar-benar ditulis (0..1)
+LOG_SAMPLE_RATE = float(os.environ.get("LOG_SAMPLE_RATE", "0.01"))
+
+
+def get_logger(name):
+    return logging.getLogger(name)
+
+
+def sampled(logger, level=logging.DEBUG, rate=None):
+    """
+    True kalau log di level ini aktif dan request ini terpilih sampel.
+    Kalau level tidak aktif biayanya hanya satu cek isEnabledFor.
+    """
+    if not logger.isEnabledFor(level):
+        return False
+    return random.random() < (LOG_SAMPLE_RATE if rate is None else rate)
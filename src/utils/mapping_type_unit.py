@@ -1,12 +1,69 @@
+from functools import lru_cache
 from .entry_map import entry_map
+from .fuzzy import FuzzyIndex
 
-def get_entry_category(merek, tipe):
-    merek = str(merek).upper()
-    tipe = str(tipe).upper()
 
-    if merek in entry_map:
-        for level, tipe_list in entry_map[merek].items():
+def _build_index(entry_map):
+    """
+    Index per merek: {tipe_model: level} + daftar panjang key (terpanjang dulu).
+    Kalau tipe model yang sama ada di beberapa level (mis. REDMI "NOTE 12 PRO"
+    di Mid dan High), level yang tercantum lebih dulu di entry_map yang dipakai.
+    """
+    index = {}
+    for merek, levels in entry_map.items():
+        lookup = {}
+        for level, tipe_list in levels.items():
             for t in tipe_list:
-                if t in tipe:
-                    return level
-    return "Unknown"
+                lookup.setdefault(t, level)
+        lengths = sorted({len(t) for t in lookup}, reverse=True)
+        # Nomor model harus sama persis: "S24 ULTRA" bukan salah ketik "S20 ULTRA"
+        index[merek] = (lookup, lengths, FuzzyIndex(lookup, exact_digits=True))
+    return index
+
+
+_ENTRY_INDEX = _build_index(entry_map)
+_MEREK_FUZZY = FuzzyIndex(_ENTRY_INDEX)
+
+
+def _cuts_digits(tipe, start, end):
+    """Potongan tipe[start:end] memotong deret angka (mis. "RENO 1" di "RENO 11")"""
+    return (
+        (end < len(tipe) and tipe[end].isdigit() and tipe[end - 1].isdigit())
+        or (start > 0 and tipe[start - 1].isdigit() and tipe[start].isdigit())
+    )
+
+
+@lru_cache(maxsize=4096)
+def _lookup_entry_category(merek, tipe):
+    if merek not in _ENTRY_INDEX:
+        match = _MEREK_FUZZY.best(merek)
+        if match is None:
+            return "Unknown"
+        merek = match[0]
+
+    lookup, lengths, fuzzy = _ENTRY_INDEX[merek]
+    # Cek potongan teks per panjang key (terpanjang dulu, lalu posisi paling kiri):
+    # biaya tergantung panjang teks, bukan jumlah tipe di entry_map.
+    # Nomor model harus utuh: "RENO 1" tidak cocok dengan "RENO 11".
+    for n in lengths:
+        for i in range(len(tipe) - n + 1):
+            level = lookup.get(tipe[i:i + n])
+            if level is not None and not _cuts_digits(tipe, i, i + n):
+                return level
+
+    # Tidak ada tipe yang muncul persis: tipe terdekat (salah ketik huruf, mis. "A03 CORR";
+    # angka berbeda = model lain -> Unknown)
+    match = fuzzy.best(tipe)
+    if match is None:
+        return "Unknown"
+    return lookup[match[0]]
+
+
+def get_entry_category(merek, tipe):
+    """
+    Kategori unit (Entry / Mid / High Level) berdasarkan merek dan tipe.
+    Aturan: tipe model terpanjang yang muncul di teks tipe menang (deret angka
+    tidak boleh terpotong); kalau tidak ada, merek/tipe dicocokkan ke nama
+    terdekat di entry_map, dengan salah ketik hanya di huruf (angka harus sama).
+    """
+    return _lookup_entry_category(str(merek).upper(), str(tipe).upper())
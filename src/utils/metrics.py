@@ -0,0 +1,122 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+# Batas bucket default (detik), cocok untuk latency per tahap request
+DEFAULT_BUCKETS = (
+    0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+    0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0,
+)
+
+_metrics = []
+
+
+class Histogram:
+    """Histogram format Prometheus (per proses / worker gunicorn)"""
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+        _metrics.append(self)
+
+    def observe(self, value, *labelvalues):
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                # [jumlah per bucket (+Inf di akhir), total nilai]
+                series = self._series[labelvalues] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][i] += 1
+            series[1] += value
+
+    @contextmanager
+    def time(self, *labelvalues):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *labelvalues)
+
+    def _labels(self, labelvalues, extra=None):
+        pairs = list(zip(self.labelnames, labelvalues))
+        if extra:
+            pairs.append(extra)
+        if not pairs:
+            return ""
+        return "{" + ",".join(f'{k}="{v}"' for k, v in pairs) + "}"
+
+    def render(self):
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} histogram",
+        ]
+        with self._lock:
+            series = {k: (list(v[0]), v[1]) for k, v in self._series.items()}
+
+        for labelvalues, (counts, total) in sorted(series.items()):
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float("inf"),), counts):
+                cumulative += n
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f"{self.name}_bucket{self._labels(labelvalues, ('le', le))} {cumulative}")
+            lines.append(f"{self.name}_sum{self._labels(labelvalues)} {total}")
+            lines.append(f"{self.name}_count{self._labels(labelvalues)} {cumulative}")
+        return "\n".join(lines)
+
+
+def render_gauges(prefix, values, documentation=""):
+    """Angka sederhana (mis. statistik cache) sebagai gauge Prometheus"""
+    lines = []
+    for key, value in values.items():
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            continue
+        name = f"{prefix}_{key}"
+        lines.append(f"# HELP {name} {documentation or key}")
+        lines.append(f"# TYPE {name} gauge")
+        lines.append(f"{name} {value}")
+    return "\n".join(lines)
+
+
+def render_metrics():
+    return "\n".join(m.render() for m in _metrics) + "\n"
+
+
+ESTIMATE_STAGE_SECONDS = Histogram(
+    "estimate_stage_seconds",
+    "Durasi tiap tahap /estimate (parse, model, preprocess, lookup, response)",
+    ["stage"],
+)
+ESTIMATE_REQUEST_SECONDS = Histogram(
+    "estimate_request_seconds",
+    "Durasi total request /estimate dan /estimate/batch",
+    ["endpoint"],
+)
+TRAIN_STAGE_SECONDS = Histogram(
+    "train_stage_seconds",
+    "Durasi tiap tahap training (hash_data, load_data, search, fit, evaluate, compile, regression, save, render_tree)",
+    ["stage"],
+)
+
+
+class StageTimer:
+    """Catat durasi per tahap ke dict (untuk hasil training) dan ke histogram"""
+
+    def __init__(self, histogram=None):
+        self.histogram = histogram
+        self.seconds = {}
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.seconds[name] = self.seconds.get(name, 0.0) + elapsed
+            if self.histogram is not None:
+                self.histogram.observe(elapsed, name)
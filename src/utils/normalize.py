@@ -1,8 +1,51 @@
+import re
+from functools import lru_cache
 from .mapping_damage import damage_map
+from .waktu_mapping import waktu_mapping
+from .fuzzy import FuzzyIndex
+
+# Semua key damage_map digabung jadi satu regex (dibangun sekali saat import).
+# Lookahead dipakai supaya match yang saling tumpang tindih tetap terlihat,
+# alternatif diurutkan dari yang terpanjang agar di setiap posisi yang
+# terambil adalah key terpanjang.
+_DAMAGE_KEYS = sorted(damage_map, key=len, reverse=True)
+_DAMAGE_PATTERN = re.compile(
+    "(?=(" + "|".join(re.escape(k) for k in _DAMAGE_KEYS) + "))"
+)
+
+# Nama kerusakan baku (hasil damage_map + key waktu_mapping) dan semua key
+# damage_map -> nama baku; dipakai untuk mencocokkan teks yang salah ketik
+_DAMAGE_TARGETS = {v: v for v in list(damage_map.values()) + list(waktu_mapping)}
+for _key, _value in damage_map.items():
+    _DAMAGE_TARGETS.setdefault(_key, _value)
+_DAMAGE_FUZZY = FuzzyIndex(_DAMAGE_TARGETS, per_token=True)
+
+
+@lru_cache(maxsize=4096)
+def _match_damage(text: str) -> str:
+    best = None
+    for m in _DAMAGE_PATTERN.finditer(text):
+        key = m.group(1)
+        # Key terpanjang menang; kalau sama panjang, yang muncul lebih dulu
+        if best is None or len(key) > len(best):
+            best = key
+    if best is not None:
+        return damage_map[best]
+    if text in _DAMAGE_TARGETS:
+        return text
+
+    # Tidak ada key yang muncul persis: coba key terdekat (salah ketik)
+    match = _DAMAGE_FUZZY.best(text)
+    if match is None:
+        return text
+    return _DAMAGE_TARGETS[match[0]]
+
 
 def normalize_damage(text: str) -> str:
-    text = text.lower().strip()
-    for raw, normalized in damage_map.items():
-        if raw in text:
-            return normalized
-    return text
+    """
+    Normalisasi teks kerusakan memakai damage_map.
+    Aturan: key terpanjang yang muncul di teks menang (mis. "tombol power"
+    mengalahkan "tombol"), tidak tergantung urutan dict. Kalau tidak ada,
+    teks dicocokkan ke key/nama baku terdekat (mis. "flexiblle finger").
+    """
+    return _match_damage(text.lower().strip())
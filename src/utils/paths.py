@@ -1,13 +1,34 @@
-import joblib
 import os
+import re
 
 MODEL_PATH = "model/model.pkl"
 ENCODER_PATH = "model/encoders.pkl"
 DATA_PATH = "data/dataset.xlsx"
+JOBS_DIR = "model/jobs"
+DATASET_CACHE_DIR = "data/cache"
+RECORDS_DIR = "data/records"
+BUNDLE_PATH = "model/model.bundle"
+CANDIDATE_BUNDLE_PATH = "model/candidate.bundle"
+STATS_DIR = "model/stats"
 
-# Load model & encoder jika ada
-model = None
-encoders = None
-if os.path.exists(MODEL_PATH) and os.path.exists(ENCODER_PATH):
-    model = joblib.load(MODEL_PATH)
-    encoders = joblib.load(ENCODER_PATH)
+# Nama cabang (tenant): dipakai sebagai nama folder, jadi dibatasi
+BRANCH_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+
+def check_branch(branch):
+    """Return branch kalau namanya valid (None juga valid = model default), selain itu ValueError"""
+    if branch is not None and (not isinstance(branch, str) or not BRANCH_PATTERN.match(branch)):
+        raise ValueError("branch hanya boleh berisi huruf, angka, '_' atau '-' (maks. 64)")
+    return branch
+
+
+def for_branch(path, branch=None):
+    """
+    Path versi cabang: model/model.pkl -> model/branches/<cabang>/model.pkl,
+    data/dataset.xlsx -> data/branches/<cabang>/dataset.xlsx.
+    Tanpa cabang (None) path tidak berubah.
+    """
+    if check_branch(branch) is None:
+        return path
+    head, name = os.path.split(path)
+    return os.path.join(head, "branches", branch, name)
@@ -1,50 +1,98 @@
 import re
+import sys
+from functools import lru_cache
+import numpy as np
 import pandas as pd
 from utils.normalize import normalize_damage
+from utils import fuzzy, mapping_type_unit, normalize
 from utils.mapping_type_unit import get_entry_category
+from utils.mapping_damage import damage_map
 from utils.waktu_mapping import waktu_mapping
-from utils.waktu_kategori import kategori_waktu
+from utils.entry_map import entry_map
+from utils.dataset_cache import content_hash, source_hash
+# Preprocessing input prediksi ada di modul tanpa pandas (dipakai serving)
+from utils.input_preprocessing import preprocess_input  # noqa: F401
 
 INVALID_KEYWORDS = ['?', ',', '+']
 ESCAPED_INVALID = [re.escape(k) for k in INVALID_KEYWORDS]
+INVALID_PATTERN = re.compile('|'.join(ESCAPED_INVALID))
+
+TEXT_COLUMNS = ['MEREK', 'TIPE UNIT', 'KERUSAKAN']
 
 def clean_text(df):
     """Bersihkan merek, tipe unit, kerusakan"""
-    for col in ['MEREK', 'TIPE UNIT', 'KERUSAKAN']:
-        df[col] = df[col].astype(str).str.strip().str.lower()
-        df = df[~df[col].str.contains('|'.join(ESCAPED_INVALID), na=False)]
-    return df
+    df = df.copy()
+    invalid = np.zeros(len(df), dtype=bool)
+    for col in TEXT_COLUMNS:
+        # Operasi string hanya dijalankan pada nilai unik. NaN jadi nilai unik
+        # sendiri (bukan kode -1, yang akan mengambil nilai unik terakhir)
+        codes, uniques = pd.factorize(df[col].astype(str), use_na_sentinel=False)
+        cleaned = pd.Series(uniques).str.strip().str.lower()
+        df[col] = cleaned.to_numpy(dtype=object)[codes]
+        invalid |= cleaned.str.contains(INVALID_PATTERN, na=False).to_numpy()[codes]
+    # Satu mask gabungan, frame hanya difilter sekali
+    return df[~invalid]
+
+def clean_biaya(df):
+    """Buang baris dengan BIAYA bukan angka, tidak hingga, atau <= 0 (di luar kategori biaya)"""
+    biaya = pd.to_numeric(df['BIAYA'], errors='coerce').to_numpy(dtype=float)
+    with np.errstate(invalid='ignore'):
+        valid = np.isfinite(biaya) & (biaya > 0)
+    return df[valid]
 
-def filter_kerusakan_minimum(df, min_count=9):
+MIN_KERUSAKAN_COUNT = 9
+
+def filter_kerusakan_minimum(df, min_count=MIN_KERUSAKAN_COUNT):
     """Hapus kategori kerusakan yang jumlahnya terlalu sedikit"""
     kerusakan_counts = df['KERUSAKAN'].value_counts()
     allowed = kerusakan_counts[kerusakan_counts >= min_count].index
     return df[df['KERUSAKAN'].isin(allowed)]
 
-def preprocess_training(df):
-    """Preprocessing full untuk training"""
-    
+def _map_unique(values, func):
+    """Jalankan func sekali per nilai unik, lalu sebar kembali lewat kode kategori"""
+    codes, uniques = pd.factorize(values, use_na_sentinel=False)
+    mapped = np.array([func(u) for u in uniques], dtype=object)
+    return mapped[codes]
+
+def preprocess_records(df):
+    """Preprocessing per baris (tanpa filter jumlah minimum), bisa dipakai untuk data baru saja"""
+
     df = clean_text(df)
+    df = clean_biaya(df)
 
-    df["KERUSAKAN"] = df["KERUSAKAN"].apply(normalize_damage)
-    df["TIPE UNIT"] = df.apply(lambda x: get_entry_category(x["MEREK"], x["TIPE UNIT"]), axis=1)
+    df["KERUSAKAN"] = _map_unique(df["KERUSAKAN"], normalize_damage)
 
-    df = filter_kerusakan_minimum(df)
+    pairs = pd.MultiIndex.from_arrays([df["MEREK"], df["TIPE UNIT"]])
+    df["TIPE UNIT"] = _map_unique(pairs, lambda x: get_entry_category(x[0], x[1]))
 
     return df
 
+# Naikkan kalau logika preprocessing berubah di luar modul yang source-nya di-hash
+PREPROCESS_VERSION = 1
 
-def preprocess_input(brand, tipe, damage):
-    """Preprocessing untuk 1 data input user pada saat prediksi"""
-
-    brand = brand.lower().strip()
-    tipe = tipe.lower().strip()
-    damage = damage.lower().strip()
+@lru_cache(maxsize=1)
+def preprocess_fingerprint():
+    """
+    Hash semua yang menentukan hasil preprocess_records selain data mentah:
+    tabel mapping, keyword invalid, batas fuzzy matching, dan source modul
+    preprocessing (normalisasi kerusakan, mapping tipe unit, fuzzy).
+    """
+    return content_hash({
+        "version": PREPROCESS_VERSION,
+        "code": source_hash(sys.modules[__name__], normalize, mapping_type_unit, fuzzy),
+        # Batas salah ketik per panjang teks (sampai di atas batas terpanjang)
+        "fuzzy": {"ngram": fuzzy.NGRAM, "max_typos": [fuzzy.max_typos("x" * n) for n in range(20)]},
+        "invalid_keywords": INVALID_KEYWORDS,
+        "damage_map": damage_map,
+        "waktu_mapping": waktu_mapping,
+        "entry_map": entry_map,
+    })
 
-    damage = normalize_damage(damage)
-    tipe = get_entry_category(brand, tipe)
-    
-    waktu_estimasi = waktu_mapping.get(damage, "Tidak diketahui")
-    kategori = kategori_waktu(waktu_estimasi)
+def preprocess_training(df):
+    """Preprocessing full untuk training"""
     
-    return brand, tipe, damage, kategori, waktu_estimasi
+    df = preprocess_records(df)
+
+    df = filter_kerusakan_minimum(df)
+
+    return df
@@ -0,0 +1,12 @@
+import os
+
+
+def pid_alive(pid):
+    """True kalau proses pid masih ada (termasuk milik user lain)"""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
@@ -0,0 +1,316 @@
+import fcntl
+import glob
+import hashlib
+import json
+import os
+from contextlib import contextmanager
+import pandas as pd
+import numpy as np
+from utils.dataset_cache import TEXT_COLUMNS, DATASET_COLUMNS, file_hash, content_hash, save_arrays
+from utils.ingest import CHUNK_ROWS, CodeAccumulator, ingest_file
+from utils.preprocessing import preprocess_records, preprocess_fingerprint, MIN_KERUSAKAN_COUNT
+from utils.log import get_logger
+from utils.paths import DATA_PATH, RECORDS_DIR, for_branch
+
+logger = get_logger(__name__)
+
+# Data tambahan mentah (1 baris JSON per record, kolom DATASET_COLUMNS), hanya
+# ditambah. Sumber untuk memproses ulang semua record kalau tabel mapping atau
+# logika preprocessing berubah.
+APPENDED_FILE = "records.jsonl"
+# Hasil preprocessing record tambahan per preprocess_fingerprint():
+# processed-<fp>.jsonl (baris) + processed-<fp>.json (state: byte records.jsonl
+# yang sudah diproses, byte baris, dan jumlah berjalan per nilai kolom teks)
+PROCESSED_PREFIX = "processed-"
+LOCK_FILE = ".lock"
+
+
+def _store_path(name, branch=None):
+    """File di record store (per cabang: data/branches/<cabang>/records/...)"""
+    return os.path.join(for_branch(RECORDS_DIR, branch), name)
+
+
+@contextmanager
+def _store_lock(branch=None):
+    """Lock antar worker/proses untuk menulis record store"""
+    os.makedirs(for_branch(RECORDS_DIR, branch), exist_ok=True)
+    with open(_store_path(LOCK_FILE, branch), "w") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _base_path(digest, branch=None):
+    return _store_path(f"base-{digest[:16]}.npz", branch)
+
+
+def dataset_path(branch=None):
+    """Dataset utama: dataset.xlsx, .csv, atau .jsonl (yang pertama ada) di folder cabang"""
+    default = for_branch(DATA_PATH, branch)
+    base = os.path.splitext(default)[0]
+    for ext in (".xlsx", ".csv", ".jsonl"):
+        if os.path.exists(base + ext):
+            return base + ext
+    return default
+
+
+def has_training_data(path=DATA_PATH, branch=None):
+    """Ada dataset utama atau record tambahan (cabang bisa dilatih dari /records saja)"""
+    if os.path.exists(path):
+        return True
+    try:
+        return os.path.getsize(_store_path(APPENDED_FILE, branch)) > 0
+    except FileNotFoundError:
+        return False
+
+
+def _base_key(dataset_hash):
+    """Hasil preprocessing ditentukan isi file sumber + tabel mapping/keyword (+ format file)"""
+    return content_hash({"dataset": dataset_hash, "preprocess": preprocess_fingerprint(), "format": 2})
+
+
+def load_base(path=DATA_PATH, branch=None, dataset_hash=None):
+    """
+    Dataset utama yang sudah dipreprocessing, sebagai CodeAccumulator (kode per
+    kolom teks + jumlah per nilai); hanya dihitung ulang kalau file sumber atau
+    tabel mapping berubah.
+    File sumber (CSV/JSONL/Excel) dibaca per chunk, jadi memori tidak tergantung ukuran file.
+    """
+    if dataset_hash is None:
+        dataset_hash = file_hash(path)
+    base_path = _base_path(_base_key(dataset_hash), branch)
+    if not os.path.exists(base_path):
+        acc = ingest_file(path, lambda chunk: preprocess_records(chunk.dropna()))
+        save_arrays(acc.arrays(), base_path)
+        return acc
+
+    with np.load(base_path) as npz:
+        return CodeAccumulator.from_arrays({name: npz[name] for name in npz.files})
+
+
+def _processed_paths(branch=None):
+    """(baris hasil preprocessing, state) untuk tabel mapping/logika preprocessing saat ini"""
+    name = f"{PROCESSED_PREFIX}{preprocess_fingerprint()[:16]}"
+    return _store_path(f"{name}.jsonl", branch), _store_path(f"{name}.json", branch)
+
+
+def _file_size(path):
+    try:
+        return os.path.getsize(path)
+    except FileNotFoundError:
+        return 0
+
+
+def _new_state(branch=None):
+    """State kosong untuk fingerprint baru; store fingerprint lama dihapus"""
+    rows_path, state_path = _processed_paths(branch)
+    for old_path in glob.glob(_store_path(f"{PROCESSED_PREFIX}*", branch)):
+        if old_path not in (rows_path, state_path):
+            try:
+                os.remove(old_path)
+            except FileNotFoundError:
+                pass
+    # File baru (bukan truncate): pembaca yang masih membuka file lama tidak terganggu
+    tmp_path = f"{rows_path}.tmp-{os.getpid()}"
+    with open(tmp_path, "wb"):
+        pass
+    os.replace(tmp_path, rows_path)
+    return {"raw_bytes": 0, "processed_bytes": 0, "counts": {col: {} for col in TEXT_COLUMNS}}
+
+
+def _read_state(branch=None):
+    _, state_path = _processed_paths(branch)
+    try:
+        with open(state_path) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def _write_state(state, branch=None):
+    _, state_path = _processed_paths(branch)
+    tmp_path = f"{state_path}.tmp-{os.getpid()}"
+    with open(tmp_path, "w") as f:
+        json.dump(state, f, ensure_ascii=False)
+    os.replace(tmp_path, state_path)
+
+
+def _iter_jsonl(f, start=0, end=None, chunksize=CHUNK_ROWS):
+    """
+    Record JSONL dari file biner f, offset start sampai end (None = akhir file),
+    per chunk. Yield (DataFrame kolom DATASET_COLUMNS, offset setelah chunk).
+    Baris terakhir yang belum lengkap (tanpa newline) tidak dibaca. Baris rusak
+    (mis. tulisan terpotong saat proses mati) dilewati dan dicatat di log.
+    """
+    f.seek(start)
+    offset = start
+    rows = []
+    bad = []
+    for line in f:
+        if not line.endswith(b"\n") or (end is not None and offset + len(line) > end):
+            break
+        offset += len(line)
+        if line.strip():
+            try:
+                row = json.loads(line)
+            except ValueError:
+                row = None
+            if isinstance(row, dict):
+                rows.append(row)
+            else:
+                bad.append(offset - len(line))
+        if len(rows) >= chunksize:
+            yield pd.DataFrame(rows).reindex(columns=DATASET_COLUMNS), offset
+            rows = []
+    if bad:
+        logger.warning(
+            "%d baris rusak di %s dilewati (offset %s)",
+            len(bad), f.name, ", ".join(map(str, bad[:20])),
+        )
+    yield pd.DataFrame(rows).reindex(columns=DATASET_COLUMNS), offset
+
+
+def _append_processed(processed, raw_bytes, state, branch=None):
+    """
+    Tambahkan baris hasil preprocessing + jumlah per nilai ke store (di bawah
+    _store_lock). Sisa tulisan yang tidak tercatat di state (proses mati di
+    tengah) dipotong dulu, jadi tidak ada baris ganda.
+    """
+    rows_path, _ = _processed_paths(branch)
+    with open(rows_path, "r+b") as f:
+        f.truncate(state["processed_bytes"])
+        f.seek(state["processed_bytes"])
+        f.write("".join(
+            json.dumps(row, ensure_ascii=False) + "\n"
+            for row in processed[DATASET_COLUMNS].to_dict(orient="records")
+        ).encode("utf-8"))
+        state["processed_bytes"] = f.tell()
+    for col in TEXT_COLUMNS:
+        counts = state["counts"][col]
+        for value, n in processed[col].value_counts().items():
+            counts[value] = counts.get(value, 0) + int(n)
+    state["raw_bytes"] = raw_bytes
+    _write_state(state, branch)
+
+
+def _sync_processed(branch=None):
+    """
+    Samakan store hasil preprocessing dengan records.jsonl (di bawah _store_lock).
+    Hanya record mentah yang belum diproses yang dipreprocessing (per chunk);
+    semuanya diproses ulang hanya kalau fingerprint preprocessing berubah.
+    Return state.
+    """
+    state = _read_state(branch)
+    raw_path = _store_path(APPENDED_FILE, branch)
+    raw_size = _file_size(raw_path)
+    if state is None or raw_size < state["raw_bytes"]:
+        state = _new_state(branch)
+    if raw_size > state["raw_bytes"]:
+        with open(raw_path, "rb") as f:
+            for chunk, offset in _iter_jsonl(f, state["raw_bytes"]):
+                _append_processed(preprocess_records(chunk.dropna()), offset, state, branch)
+    return state
+
+
+def append_records(df, branch=None):
+    """
+    Simpan data baru ke store: mentah (records.jsonl) dan hasil preprocessing
+    (dipakai training) beserta jumlah per nilai, tanpa memproses ulang record lama.
+    df berisi kolom MEREK, TIPE UNIT, KERUSAKAN, BIAYA.
+    Return DataFrame hasil preprocessing baris yang diterima (baris yang dibuang
+    preprocessing tidak disimpan).
+    """
+    raw = df[DATASET_COLUMNS].dropna()
+    processed = preprocess_records(raw)
+    if processed.empty:
+        return processed
+
+    lines = "".join(
+        json.dumps(row, ensure_ascii=False) + "\n"
+        for row in raw.loc[processed.index].to_dict(orient="records")
+    )
+    with _store_lock(branch):
+        state = _sync_processed(branch)
+        with open(_store_path(APPENDED_FILE, branch), "a+b") as f:
+            # Baris terakhir terpotong (proses mati saat menulis): mulai di baris baru
+            # supaya record pertama batch ini tidak ikut rusak
+            if f.seek(0, os.SEEK_END) > 0:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    lines = "\n" + lines
+            f.write(lines.encode("utf-8"))
+            raw_bytes = f.tell()
+        _append_processed(processed, raw_bytes, state, branch)
+
+    return processed
+
+
+def _raw_hash(size, branch=None):
+    """sha256 `size` byte pertama records.jsonl (file hanya ditambah, tidak diubah)"""
+    h = hashlib.sha256()
+    if size:
+        with open(_store_path(APPENDED_FILE, branch), "rb") as f:
+            while size > 0:
+                block = f.read(min(size, 1 << 20))
+                if not block:
+                    break
+                h.update(block)
+                size -= len(block)
+    return h.hexdigest()
+
+
+def _training_data_info(dataset_hash, appended_hash, min_count):
+    info = {
+        "dataset_hash": dataset_hash,
+        "appended_hash": appended_hash,
+        "preprocess_hash": preprocess_fingerprint(),
+        "min_count": int(min_count),
+    }
+    return {"hash": content_hash(info), **info}
+
+
+def _dataset_hash(path):
+    """None kalau dataset utama tidak ada (training hanya dari record tambahan)"""
+    return file_hash(path) if os.path.exists(path) else None
+
+
+def training_data_info(path=DATA_PATH, min_count=MIN_KERUSAKAN_COUNT, branch=None):
+    """
+    Identitas isi data training tanpa memprosesnya: hash dataset mentah, record
+    tambahan, tabel mapping, dan parameter. "hash" sama -> load_training_codes
+    menghasilkan data yang sama persis.
+    """
+    with _store_lock(branch):
+        appended_hash = _raw_hash(_file_size(_store_path(APPENDED_FILE, branch)), branch)
+    return _training_data_info(_dataset_hash(path), appended_hash, min_count)
+
+
+def load_training_codes(path=DATA_PATH, min_count=MIN_KERUSAKAN_COUNT, branch=None):
+    """
+    Dataset utama + data tambahan, sudah dipreprocessing, sebagai CodeAccumulator
+    (tanpa kolom string per baris). Dataset utama diambil dari cache (per hash
+    isi + mapping), record tambahan dibaca per chunk dari store hasil
+    preprocessing; jumlah per nilainya diambil dari jumlah berjalan di store.
+    Filter jumlah minimum (min_count) dilakukan saat encode (services/training_data).
+    Return (CodeAccumulator, info); info = training_data_info dari data yang benar-benar
+    dibaca (record yang masuk saat training tidak membuat hash-nya salah).
+    """
+    dataset_hash = _dataset_hash(path)
+    if dataset_hash is None:
+        acc = CodeAccumulator()
+    else:
+        acc = load_base(path, branch, dataset_hash=dataset_hash)
+
+    rows_path, _ = _processed_paths(branch)
+    with _store_lock(branch):
+        state = _sync_processed(branch)
+        appended_hash = _raw_hash(state["raw_bytes"], branch)
+        # File dibuka di bawah lock: store yang dibangun ulang (os.replace) tidak terbaca setengah
+        rows = open(rows_path, "rb")
+    with rows:
+        for chunk, _ in _iter_jsonl(rows, end=state["processed_bytes"]):
+            acc.add(chunk, count=False)
+    acc.add_counts(state["counts"])
+    return acc, _training_data_info(dataset_hash, appended_hash, min_count)
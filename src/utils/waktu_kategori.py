@@ -1,3 +1,7 @@
+import re
+from utils.waktu_mapping import waktu_mapping
+
+
 def kategori_waktu(val: str):
     v = str(val).lower()
 
@@ -9,3 +13,31 @@ def kategori_waktu(val: str):
         return "Lama"
     else:
         return "Tidak Diketahui"
+
+
+MENIT_PER_SATUAN = {"menit": 1, "jam": 60, "hari": 24 * 60}
+_WAKTU_PATTERN = re.compile(r"(\d+)\s*(menit|jam|hari)?")
+
+
+def parse_waktu_menit(val: str):
+    """
+    "30 Menit - 1 Jam" -> (30, 60), "2 - 5 Hari" -> (2880, 7200), "10 Menit" -> (10, 10).
+    Angka tanpa satuan memakai satuan angka sesudahnya. None kalau tidak bisa dibaca.
+    """
+    parts = _WAKTU_PATTERN.findall(str(val).lower())
+    if not parts:
+        return None
+
+    menit = []
+    satuan = None
+    for angka, unit in reversed(parts):
+        satuan = unit or satuan
+        if satuan is None:
+            return None
+        menit.append(int(angka) * MENIT_PER_SATUAN[satuan])
+    return min(menit), max(menit)
+
+
+# Dihitung sekali saat import: kerusakan -> kategori / (menit min, menit max)
+KATEGORI_WAKTU = {damage: kategori_waktu(val) for damage, val in waktu_mapping.items()}
+WAKTU_MENIT = {damage: parse_waktu_menit(val) for damage, val in waktu_mapping.items()}
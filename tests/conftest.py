@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Modul aplikasi di-import seperti saat serving (PYTHONPATH=src)
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
@@ -0,0 +1,41 @@
+import pytest
+from utils.fuzzy import FuzzyIndex, digit_runs
+from utils.mapping_type_unit import get_entry_category
+
+
+@pytest.mark.parametrize("merek, tipe, expected", [
+    ("SAMSUNG", "A03 CORE", "Entry Level"),
+    # Salah ketik huruf tetap dicocokkan
+    ("SAMSUNG", "A03 CORR", "Entry Level"),
+    ("SAMSNG", "A03 CORE", "Entry Level"),
+    ("samsung", "galaxy a52", "Mid Level"),
+])
+def test_known_types_and_letter_typos(merek, tipe, expected):
+    assert get_entry_category(merek, tipe) == expected
+
+
+@pytest.mark.parametrize("merek, tipe", [
+    # Model lebih baru dengan nomor berbeda satu digit: bukan salah ketik
+    ("REDMI", "NOTE 14 PRO"),
+    ("SAMSUNG", "S24 ULTRA"),
+    ("VIVO", "X200"),
+    ("OPPO", "RENO 11"),
+    # Key pendek tidak boleh memotong deret angka ("5" di "50I")
+    ("REDMI", "NARZO 50I"),
+])
+def test_new_model_numbers_are_unknown(merek, tipe):
+    assert get_entry_category(merek, tipe) == "Unknown"
+
+
+def test_fuzzy_index_exact_digits():
+    index = FuzzyIndex(["NOTE 10 PRO", "A03 CORE"], exact_digits=True)
+    assert index.best("NOTE 14 PRO") is None
+    assert index.best("NOTE 10 PRP") == ("NOTE 10 PRO", 1)
+    assert index.best("A3 CORE") is None
+    # Tanpa exact_digits, digit boleh salah ketik
+    assert FuzzyIndex(["NOTE 10 PRO"]).best("NOTE 14 PRO") == ("NOTE 10 PRO", 1)
+
+
+def test_digit_runs():
+    assert digit_runs("NOTE 14 PRO 5G") == ("14", "5")
+    assert digit_runs("RENO") == ()
@@ -0,0 +1,33 @@
+import pytest
+from utils.fuzzy import tokens_close
+from utils.normalize import normalize_damage
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("Ganti LCD", "ganti lcd"),
+    ("tombol power", "ganti tombol"),
+    # Salah ketik di dalam kata tetap dicocokkan
+    ("ganti batrai", "ganti baterai"),
+    ("ganti baterei", "ganti baterai"),
+    ("ic gamber", "ic gambar"),
+    ("gantilcd", "ganti lcd"),
+])
+def test_known_damage_and_typos(text, expected):
+    assert normalize_damage(text) == expected
+
+
+@pytest.mark.parametrize("text", [
+    # Kata pendek berbeda = perbaikan lain, bukan salah ketik ("ic" vs "lcd")
+    "ganti ic",
+    "pasang ic",
+    "ganti sim",
+])
+def test_different_repairs_are_not_merged(text):
+    assert normalize_damage(text) == text
+
+
+def test_tokens_close():
+    assert tokens_close("ganti batrai", "ganti baterai")
+    assert tokens_close("gantitombol", "ganti tombol")
+    assert not tokens_close("ganti ic", "ganti lcd")
+    assert not tokens_close("ganti lcd baru", "ganti lcd")
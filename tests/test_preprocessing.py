@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+from utils.normalize import normalize_damage
+from utils.mapping_type_unit import get_entry_category
+from utils.preprocessing import preprocess_records, preprocess_training, ESCAPED_INVALID, filter_kerusakan_minimum
+
+
+def preprocess_training_rowwise(df):
+    """Implementasi lama (apply per baris), acuan paritas versi kolumnar"""
+    for col in ['MEREK', 'TIPE UNIT', 'KERUSAKAN']:
+        df[col] = df[col].astype(str).str.strip().str.lower()
+        df = df[~df[col].str.contains('|'.join(ESCAPED_INVALID), na=False)]
+
+    df["KERUSAKAN"] = df["KERUSAKAN"].apply(normalize_damage)
+    df["TIPE UNIT"] = df.apply(lambda x: get_entry_category(x["MEREK"], x["TIPE UNIT"]), axis=1)
+
+    return filter_kerusakan_minimum(df)
+
+
+def fixture_dataset():
+    rows = []
+    # Kerusakan umum (lolos filter jumlah minimum), dengan variasi penulisan
+    for i in range(12):
+        rows.append(("Samsung ", "Galaxy A52", "Ganti LCD", 350000 + i))
+        rows.append(("OPPO", "reno 5", " ganti lcd", 300000 + i))
+        rows.append(("xiaomi", "REDMI NOTE 10 PRO", "ganti baterai", 150000 + i))
+    # Kerusakan langka (dibuang filter jumlah minimum)
+    rows += [("vivo", "Y20", "ganti speaker", 90000), ("vivo", "Y21", "ganti kamera", 250000)]
+    # Keyword invalid di tiap kolom
+    rows += [
+        ("samsung?", "A03", "ganti lcd", 200000),
+        ("samsung", "A03, A04", "ganti lcd", 200000),
+        ("samsung", "A03", "lcd + baterai", 400000),
+    ]
+    # Nilai kosong (KERUSAKAN kosong dibuang sebelum preprocessing, lihat ingest)
+    rows += [(np.nan, "A03", "ganti lcd", 200000), ("samsung", np.nan, "ganti baterai", 100000)]
+    return pd.DataFrame(rows, columns=["MEREK", "TIPE UNIT", "KERUSAKAN", "BIAYA"])
+
+
+def test_columnar_matches_rowwise():
+    df = fixture_dataset()
+    expected = preprocess_training_rowwise(df.copy())
+    actual = preprocess_training(df.copy())
+
+    pd.testing.assert_frame_equal(actual, expected)
+    # Fixture memang menguji filter: baris invalid dan kerusakan langka terbuang
+    assert 0 < len(actual) < len(df)
+    assert not actual["KERUSAKAN"].isin(["ganti speaker", "ganti kamera"]).any()
+    # Nilai kosong tidak boleh tertukar dengan nilai unik lain
+    assert actual["MEREK"].isna().sum() == 1
+
+
+def test_invalid_biaya_dropped():
+    df = pd.DataFrame({
+        "MEREK": ["oppo"] * 5,
+        "TIPE UNIT": ["reno 5"] * 5,
+        "KERUSAKAN": ["ganti lcd"] * 5,
+        "BIAYA": [0, -1000, np.nan, np.inf, 150000],
+    })
+    assert preprocess_records(df)["BIAYA"].tolist() == [150000]
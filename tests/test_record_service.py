@@ -0,0 +1,33 @@
+import os
+import pytest
+from services.record_service import append_records_service
+
+ROW = {"brand": "oppo", "type": "reno 5", "damage": "ganti lcd", "cost": 100000}
+
+
+@pytest.fixture(autouse=True)
+def workdir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+
+def test_branch_from_record_field():
+    result = append_records_service([{**ROW, "branch": "b1"}])
+    assert result["branch"] == "b1" and result["accepted"] == 1
+    assert os.path.exists("data/branches/b1/records/records.jsonl")
+    assert not os.path.exists("data/records/records.jsonl")
+
+
+def test_rows_for_another_branch_are_rejected():
+    result = append_records_service([{**ROW, "branch": "b2"}, ROW], branch="b1")
+    assert result["accepted"] == 1
+    assert [r["index"] for r in result["rejected"]] == [0]
+
+
+def test_mixed_branches_fail():
+    with pytest.raises(ValueError):
+        append_records_service([{**ROW, "branch": "b1"}, {**ROW, "branch": "b2"}])
+
+
+@pytest.mark.parametrize("cost", [0, -1, float("nan"), float("inf")])
+def test_invalid_cost_rejected(cost):
+    assert append_records_service([{**ROW, "cost": cost}])["accepted"] == 0
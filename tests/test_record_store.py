@@ -0,0 +1,65 @@
+import glob
+import pandas as pd
+import pytest
+from utils import record_store
+from utils.record_store import append_records, load_training_codes
+
+
+def batch(damage, n, cost=100000):
+    return pd.DataFrame({
+        "MEREK": ["oppo"] * n,
+        "TIPE UNIT": ["reno 5"] * n,
+        "KERUSAKAN": [damage] * n,
+        "BIAYA": [cost + i for i in range(n)],
+    })
+
+
+def kerusakan_counts(acc):
+    return dict(zip(acc.uniques("KERUSAKAN").tolist(), acc.counts["KERUSAKAN"].tolist()))
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    processed_rows = []
+    preprocess = record_store.preprocess_records
+
+    def counting(df):
+        processed_rows.append(len(df))
+        return preprocess(df)
+
+    monkeypatch.setattr(record_store, "preprocess_records", counting)
+    return processed_rows
+
+
+def test_only_new_records_are_preprocessed(store):
+    append_records(batch("ganti lcd", 3))
+    append_records(batch("ganti baterai", 2))
+    acc, info = load_training_codes("data/missing.xlsx")
+    assert store == [3, 2]
+    assert acc.rows == 5
+    assert kerusakan_counts(acc) == {"ganti lcd": 3, "ganti baterai": 2}
+    assert info["dataset_hash"] is None
+
+
+def test_truncated_line_is_skipped(store):
+    append_records(batch("ganti lcd", 3))
+    # Proses mati di tengah menulis baris
+    with open("data/records/records.jsonl", "ab") as f:
+        f.write(b'{"MEREK": "oppo", "TIPE')
+    append_records(batch("ganti baterai", 2))
+    acc, _ = load_training_codes("data/missing.xlsx")
+    assert kerusakan_counts(acc) == {"ganti lcd": 3, "ganti baterai": 2}
+
+
+def test_fingerprint_change_reprocesses_all_records(store, monkeypatch):
+    append_records(batch("ganti lcd", 3))
+    append_records(batch("ganti baterai", 2))
+    before, _ = load_training_codes("data/missing.xlsx")
+    old_files = set(glob.glob("data/records/processed-*"))
+
+    monkeypatch.setattr(record_store, "preprocess_fingerprint", lambda: "f" * 64)
+    acc, _ = load_training_codes("data/missing.xlsx")
+    assert store[-1] == 5
+    assert kerusakan_counts(acc) == kerusakan_counts(before)
+    assert not old_files & set(glob.glob("data/records/processed-*"))
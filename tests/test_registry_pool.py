@@ -0,0 +1,39 @@
+import os
+import pytest
+from services.model_registry import RegistryPool
+from utils.paths import BUNDLE_PATH, for_branch
+
+
+def trained(branch):
+    path = for_branch(BUNDLE_PATH, branch)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    open(path, "wb").close()
+
+
+def test_untrained_branches_are_not_pooled(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    pool = RegistryPool()
+    for i in range(100):
+        assert pool.registry(f"b{i}").get() is None
+    assert pool.stats()["branches"] == {}
+
+    trained("b1")
+    assert pool.registry("b1") is pool.registry("b1")
+    assert list(pool.stats()["branches"]) == ["b1"]
+
+
+def test_branch_count_is_capped(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    pool = RegistryPool(max_branches=2)
+    for branch in ("b1", "b2", "b3"):
+        trained(branch)
+        pool.registry(branch)
+    assert list(pool.stats()["branches"]) == ["b2", "b3"]
+    assert pool.evictions == 1
+
+
+def test_candidate_with_branch_rejected():
+    from services.train_jobs import submit_train_job
+
+    with pytest.raises(ValueError):
+        submit_train_job(candidate=True, branch="b1")
@@ -0,0 +1,27 @@
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+from services import train_jobs
+
+
+class FakeExecutor:
+    def shutdown(self, wait=True):
+        self.shut_down = True
+
+
+def test_dead_training_process_fails_job_and_resets_executor(tmp_path, monkeypatch):
+    monkeypatch.setattr(train_jobs, "JOBS_DIR", str(tmp_path))
+    executor = FakeExecutor()
+    monkeypatch.setattr(train_jobs, "_executor", executor)
+
+    job = {"id": "job1", "status": "running", "pid": 123, "options": {"branch": "b1"}}
+    train_jobs._write_job(job)
+    lock_path = train_jobs._lock_path("b1")
+    assert train_jobs._acquire_lock("job1", lock_path) is None
+
+    future = Future()
+    future.add_done_callback(lambda f: train_jobs._on_job_done(job, executor, f))
+    future.set_exception(BrokenProcessPool("proses anak mati"))
+
+    assert train_jobs.get_job("job1")["status"] == "failed"
+    assert train_jobs._read_lock(lock_path) is None
+    assert train_jobs._executor is None and executor.shut_down
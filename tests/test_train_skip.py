@@ -0,0 +1,48 @@
+from types import SimpleNamespace
+from services import train_service
+from services.train_service import _unchanged_result, training_fingerprint
+from utils.metrics import StageTimer, TRAIN_STAGE_SECONDS
+
+
+def snapshot(options, evaluation=True):
+    manifest = {
+        "version": "v1",
+        "metrics": {"accuracy": 0.8, "total_data": 10, "compiled_combinations": 4},
+        "training_data": {"hash": "data-1"},
+        "training_options": options,
+    }
+    if evaluation:
+        manifest["evaluation"] = {
+            "confusion_matrix": [[1, 0], [0, 1]],
+            "classification_report": {"accuracy": 0.8},
+            "model_selection": {"best": {"name": "decision_tree"}},
+        }
+    return SimpleNamespace(manifest=manifest)
+
+
+def options(search=False):
+    return {"search": search, "regression": False, "fingerprint": training_fingerprint(search)}
+
+
+def test_skipped_result_keeps_evaluation():
+    result = _unchanged_result(snapshot(options()), {"hash": "data-1"}, options(), None, StageTimer(TRAIN_STAGE_SECONDS))
+    assert result["skipped"] is True
+    assert result["confusion_matrix"] == [[1, 0], [0, 1]]
+    assert result["classification_report"] == {"accuracy": 0.8}
+    assert result["model_selection"] == {"best": {"name": "decision_tree"}}
+
+
+def test_not_skipped_when_options_data_or_manifest_differ():
+    timer = StageTimer(TRAIN_STAGE_SECONDS)
+    assert _unchanged_result(snapshot(options()), {"hash": "data-2"}, options(), None, timer) is None
+    assert _unchanged_result(snapshot(options()), {"hash": "data-1"}, options(search=True), None, timer) is None
+    # Manifest lama tanpa evaluasi tersimpan
+    assert _unchanged_result(snapshot(options(), evaluation=False), {"hash": "data-1"}, options(), None, timer) is None
+
+
+def test_fingerprint_follows_training_parameters(monkeypatch):
+    before = training_fingerprint()
+    monkeypatch.setattr(train_service, "TEST_SIZE", 0.2)
+    assert training_fingerprint() != before
+    monkeypatch.setattr(train_service, "BIAYA_BINS", [0, 300000, float("inf")])
+    assert training_fingerprint() != before